@@ -0,0 +1,294 @@
+"""Generates many hex grid variants from a spec file.
+
+Run standalone, which launches Blender workers in parallel:
+
+    python hex_grid_batch.py spec.json --out build --workers 4 --blender blender
+
+Or run inside Blender in background mode:
+
+    blender -b --factory-startup --python hex_grid_batch.py -- spec.json --out build
+
+A spec is a JSON or TOML file with a list of jobs. Each job names the
+operator to emulate, its settings and the files to write:
+
+    {
+        "defaults": { "formats": ["blend"] },
+        "jobs": [
+            { "name": "tile", "operator": "mesh",
+              "params": { "rings": 1, "extrude_ub": 0.2 },
+              "formats": ["npz", "obj"] },
+            { "name": "board", "operator": "curve",
+              "params": { "rings": 12, "rounding": 0.25 } }
+        ]
+    }
+
+Job settings use the same names as the operator properties. Mesh jobs
+also accept a "transform", a 4 x 4 matrix listed row by row, which places
+vertices as they are generated. Supported
+formats are "blend", "cells", "npz", "obj" and "ply". The "cells" format
+writes a directory per mesh object holding one .npy file per column of the
+cell table: cell id, axial coordinates, center, height and face range.
+Centers are in the mesh's space, with any transform applied.
+A summary report with the timing of each job is written to summary.json in
+the output directory.
+"""
+
+import argparse
+import concurrent.futures
+import json
+import os
+import subprocess
+import sys
+import time
+
+try:
+    import bpy # type: ignore
+except ImportError:
+    bpy = None
+
+
+script_path = os.path.abspath(__file__)
+formats_supported = ["blend", "cells", "npz", "obj", "ply"]
+
+
+def load_spec(path=""):
+    with open(path, "rb") as file:
+        if path.lower().endswith(".toml"):
+            import tomllib
+            spec = tomllib.load(file)
+        else:
+            spec = json.load(file)
+
+    # A bare list of jobs is also accepted.
+    if isinstance(spec, list):
+        spec = {"jobs": spec}
+
+    defaults = spec.get("defaults", {})
+    jobs = []
+    for job_idx, entry in enumerate(spec.get("jobs", [])):
+        job = dict(defaults)
+        job.update(entry)
+        job.setdefault("name", "hex_grid_%d" % job_idx)
+        job.setdefault("operator", "mesh")
+        job.setdefault("params", {})
+        job.setdefault("formats", ["blend"])
+        jobs.append(job)
+
+    return jobs
+
+
+def run_job(job=None, out_dir=""):
+    # Imported here so that the standalone driver does not need Blender.
+    sys.path.insert(0, os.path.dirname(script_path))
+    from hex_grid_mesh import HexGridMeshMaker
+    from hex_grid_curve import HexGridCurveMaker
+
+    name = job["name"]
+    operator = job["operator"]
+    formats = job["formats"]
+    report = {"name": name, "operator": operator, "files": []}
+
+    for fmt in formats:
+        if fmt not in formats_supported:
+            raise ValueError("Unsupported format: %s" % fmt)
+
+    # Start from an empty file so that each job is independent.
+    bpy.ops.wm.read_homefile(use_empty=True)
+    scene = bpy.context.scene
+
+    start = time.perf_counter()
+    if operator == "curve":
+        data = HexGridCurveMaker.run_steps(
+            HexGridCurveMaker.curve_steps(**job["params"]))
+        HexGridCurveMaker.link_curves(
+            collection=scene.collection,
+            curves=data)
+    else:
+        data = HexGridMeshMaker.run_steps(
+            HexGridMeshMaker.mesh_steps(**job["params"]))
+        HexGridMeshMaker.link_meshes(
+            collection=scene.collection,
+            meshes=data)
+    report["generate_sec"] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    base_path = os.path.join(out_dir, name)
+    for fmt in formats:
+        path = base_path + "." + fmt
+        if fmt == "blend":
+            bpy.ops.wm.save_as_mainfile(filepath=path, check_existing=False)
+        elif fmt == "cells":
+            write_cells(path, HexGridMeshMaker)
+        elif fmt == "npz":
+            write_npz(path, HexGridMeshMaker)
+        elif fmt == "obj":
+            bpy.ops.wm.obj_export(filepath=path)
+        elif fmt == "ply":
+            bpy.ops.wm.ply_export(filepath=path)
+        report["files"].append(path)
+    report["write_sec"] = time.perf_counter() - start
+
+    return report
+
+
+def write_npz(path="", mesh_maker=None):
+    import numpy as np # type: ignore
+
+    # Curves are converted to meshes through the evaluated depsgraph.
+    depsgraph = bpy.context.evaluated_depsgraph_get()
+    arrays = {}
+    chunk_idx = 0
+    for obj in bpy.context.scene.objects:
+        if obj.type not in ["MESH", "CURVE"]:
+            continue
+
+        obj_eval = obj.evaluated_get(depsgraph)
+        mesh_data = obj_eval.to_mesh()
+        for key, value in mesh_maker.arrays_from_mesh(mesh_data).items():
+            arrays["%d_%s" % (chunk_idx, key)] = value
+        obj_eval.to_mesh_clear()
+        chunk_idx = chunk_idx + 1
+
+    np.savez(path, **arrays)
+
+
+def write_cells(path="", mesh_maker=None):
+    chunk_idx = 0
+    for obj in bpy.context.scene.objects:
+        if obj.type != "MESH":
+            continue
+
+        columns = mesh_maker.mesh_cell_columns(obj.data)
+        if columns is None:
+            continue
+        mesh_maker.write_cell_columns(os.path.join(path, str(chunk_idx)), columns)
+        chunk_idx = chunk_idx + 1
+
+
+def run_worker(jobs=None, out_dir=""):
+    reports = []
+    for job in jobs:
+        start = time.perf_counter()
+        try:
+            report = run_job(job, out_dir)
+            report["status"] = "ok"
+        except Exception as err:
+            report = {"name": job.get("name"), "status": "error", "error": str(err)}
+        report["total_sec"] = time.perf_counter() - start
+        reports.append(report)
+    return reports
+
+
+def launch_worker(blender="blender", job=None, out_dir=""):
+    # Each job runs in its own Blender process. Reports are read back from
+    # a file, as Blender also prints to standard out.
+    report_path = os.path.join(out_dir, ".%s.report.json" % job["name"])
+    args = [
+        blender, "-b", "--factory-startup",
+        "--python", script_path, "--",
+        "--worker-job", json.dumps(job),
+        "--worker-report", report_path,
+        "--out", out_dir]
+
+    start = time.perf_counter()
+    proc = subprocess.run(args, capture_output=True, text=True)
+    elapsed = time.perf_counter() - start
+
+    try:
+        with open(report_path, "r") as file:
+            report = json.load(file)[0]
+        os.remove(report_path)
+    except (OSError, ValueError, IndexError):
+        report = {
+            "name": job["name"],
+            "status": "error",
+            "error": proc.stderr.strip()[-2000:] or "Worker exited with code %d" % proc.returncode}
+
+    report["process_sec"] = elapsed
+    return report
+
+
+def run_parallel(blender="blender", jobs=None, out_dir="", workers=1):
+    # Threads only wait on the worker processes.
+    reports = [None] * len(jobs)
+    with concurrent.futures.ThreadPoolExecutor(max_workers=workers) as pool:
+        futures = {
+            pool.submit(launch_worker, blender, job, out_dir): job_idx
+            for job_idx, job in enumerate(jobs)}
+        for future in concurrent.futures.as_completed(futures):
+            reports[futures[future]] = future.result()
+    return reports
+
+
+def write_summary(reports=None, out_dir="", elapsed=0.0):
+    failed = [report for report in reports if report.get("status") != "ok"]
+    summary = {
+        "job_count": len(reports),
+        "failed_count": len(failed),
+        "elapsed_sec": elapsed,
+        "jobs": reports}
+
+    path = os.path.join(out_dir, "summary.json")
+    with open(path, "w") as file:
+        json.dump(summary, file, indent=4)
+
+    for report in reports:
+        print("%-32s %-6s %8.3fs" % (
+            report.get("name"),
+            report.get("status"),
+            report.get("total_sec", report.get("process_sec", 0.0))))
+    print("%d jobs, %d failed, %.3fs. Report written to %s" % (
+        len(reports), len(failed), elapsed, path))
+
+    return len(failed) == 0
+
+
+def parse_args(argv=None):
+    # Blender passes script arguments after a double dash.
+    if "--" in argv:
+        argv = argv[argv.index("--") + 1:]
+    else:
+        argv = argv[1:]
+
+    parser = argparse.ArgumentParser(
+        description="Generate hex grid variants from a JSON or TOML spec.")
+    parser.add_argument("spec", nargs="?", help="Path to the spec file")
+    parser.add_argument("--out", default="hex_grid_out", help="Output directory")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1,
+                        help="Number of parallel Blender processes")
+    parser.add_argument("--blender", default=os.environ.get("BLENDER", "blender"),
+                        help="Path to the Blender executable")
+    parser.add_argument("--worker-job", help=argparse.SUPPRESS)
+    parser.add_argument("--worker-report", help=argparse.SUPPRESS)
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(sys.argv if argv is None else argv)
+    out_dir = os.path.abspath(args.out)
+    os.makedirs(out_dir, exist_ok=True)
+
+    if args.worker_job:
+        reports = run_worker([json.loads(args.worker_job)], out_dir)
+        with open(args.worker_report, "w") as file:
+            json.dump(reports, file)
+        return 0
+
+    if not args.spec:
+        print("A spec file is required.")
+        return 2
+
+    jobs = load_spec(args.spec)
+    start = time.perf_counter()
+    if bpy is not None and args.workers <= 1:
+        reports = run_worker(jobs, out_dir)
+    else:
+        blender = bpy.app.binary_path if bpy is not None else args.blender
+        reports = run_parallel(blender, jobs, out_dir, max(1, args.workers))
+    elapsed = time.perf_counter() - start
+
+    return 0 if write_summary(reports, out_dir, elapsed) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,8 +1,13 @@
 import bpy # type: ignore
+import math
+import time
+from array import array
 from bpy.props import ( # type: ignore
+    BoolProperty,
     IntProperty,
     EnumProperty,
-    FloatProperty)
+    FloatProperty,
+    StringProperty)
 
 
 bl_info = {
@@ -23,6 +28,12 @@ class HexGridCurveMaker(bpy.types.Operator):
     bl_label = "Hex Grid"
     bl_options = {"REGISTER", "UNDO"}
 
+    # Seconds of work done per timer event when time-sliced.
+    time_slice = 1.0 / 30.0
+
+    # Steps that walk around a ring of cells, starting from its upper left.
+    ring_directions = [(0, -1), (1, -1), (1, 0), (0, 1), (-1, 1), (-1, 0)]
+
     rings: IntProperty(
         name="Rings",
         description="Number of rings in grid",
@@ -68,6 +79,14 @@ class HexGridCurveMaker(bpy.types.Operator):
         default="FREE",
         description="Handle type to use for straight edges") # type: ignore
 
+    spline_type: EnumProperty(
+        items=[
+            ("BEZIER", "Bezier", "Bezier splines with handles", 1),
+            ("POLY", "Poly", "Poly splines with six points per cell; used only when rounding is 0", 2)],
+        name="Spline Type",
+        default="BEZIER",
+        description="Spline type to use for straight edges") # type: ignore
+
     res_u: IntProperty(
         name="Resolution",
         description="Corner resolution",
@@ -75,6 +94,14 @@ class HexGridCurveMaker(bpy.types.Operator):
         soft_max=64,
         default=12) # type: ignore
 
+    output_type: EnumProperty(
+        items=[
+            ("CURVE", "Curve", "Create a curve", 1),
+            ("MESH", "Mesh", "Create a mesh from the sampled outline, without curve evaluation", 2)],
+        name="Output",
+        default="CURVE",
+        description="Type of object to create") # type: ignore
+
     fill_mode: EnumProperty(
         items=[
             ("NONE", "None", "None", 1),
@@ -103,221 +130,1037 @@ class HexGridCurveMaker(bpy.types.Operator):
         precision=3,
         subtype="FACTOR",
         default=0.0) # type: ignore
-    
+
+    board_shape: EnumProperty(
+        items=[
+            ("HEXAGON", "Hexagon", "Fill a hexagon with rings of cells", 1),
+            ("RECTANGLE", "Rectangle", "Fill a rectangle of width by height cells", 2),
+            ("PARALLELOGRAM", "Parallelogram", "Fill a parallelogram of width by height cells", 3),
+            ("TRIANGLE", "Triangle", "Fill a triangle with width cells to a side", 4),
+            ("MASK", "Image Mask", "Keep the cells of a width by height rectangle where the mask image is bright", 5)],
+        name="Board Shape",
+        default="HEXAGON",
+        description="Shape of the grid of cells") # type: ignore
+
+    board_width: IntProperty(
+        name="Board Width",
+        description="Cells per row for rectangular boards, or per side for triangles",
+        min=1,
+        soft_max=256,
+        default=8,
+        step=1) # type: ignore
+
+    board_height: IntProperty(
+        name="Board Height",
+        description="Rows of cells for rectangular boards",
+        min=1,
+        soft_max=256,
+        default=8,
+        step=1) # type: ignore
+
+    mask_image: StringProperty(
+        name="Mask Image",
+        description="Name of the image used to mask cells",
+        default="") # type: ignore
+
+    mask_threshold: FloatProperty(
+        name="Mask Threshold",
+        description="Least brightness of the mask image at a cell's center for the cell to be kept",
+        min=0.0,
+        max=1.0,
+        default=0.5) # type: ignore
+
+    cell_order: EnumProperty(
+        items=[
+            ("AXIAL", "Axial", "Order cells by column, then row", 1),
+            ("SPIRAL", "Spiral", "Order cells ring by ring, from the center outward", 2),
+            ("HILBERT", "Hilbert", "Order cells along a Hilbert curve over axial coordinates", 3),
+            ("MORTON", "Morton", "Order cells along a Z-order curve over axial coordinates", 4)],
+        name="Cell Order",
+        default="AXIAL",
+        description="Order in which cells, and their vertices and faces, are created") # type: ignore
+
+    chunk_type: EnumProperty(
+        items=[
+            ("NONE", "None", "Create a single object", 1),
+            ("REGION", "Region", "Split into N x N axial regions", 2),
+            ("SECTOR", "Sector", "Split into N sectors around the center", 3)],
+        name="Chunks",
+        default="NONE",
+        description="How to split the grid into separate objects") # type: ignore
+
+    chunk_count: IntProperty(
+        name="Chunk Count",
+        description="Regions per axis or number of sectors",
+        min=1,
+        soft_max=16,
+        default=2,
+        step=1) # type: ignore
+
+    use_modal: BoolProperty(
+        name="Time-Sliced",
+        description="Generate in batches without blocking the interface; press Esc to cancel",
+        default=False,
+        options={"SKIP_SAVE"}) # type: ignore
+
     def execute(self, context):
+        error = HexGridCurveMaker.check_mask_image(self.board_shape, self.mask_image)
+        if error:
+            self.report({"ERROR"}, error)
+            return {"CANCELLED"}
+
+        curves = HexGridCurveMaker.run_steps(HexGridCurveMaker.curve_steps(
+            **self.as_keywords(ignore=("use_modal",))))
+        HexGridCurveMaker.link_curves(
+            collection=context.collection,
+            curves=curves,
+            location=context.scene.cursor.location)
+        return {"FINISHED"}
+
+    def invoke(self, context, event):
+        if not self.use_modal:
+            return self.execute(context)
+
+        error = HexGridCurveMaker.check_mask_image(self.board_shape, self.mask_image)
+        if error:
+            self.report({"ERROR"}, error)
+            return {"CANCELLED"}
+
+        self._steps = HexGridCurveMaker.curve_steps(
+            **self.as_keywords(ignore=("use_modal",)))
+        self._step_count = 0
+        self._step_total = max(1, len(HexGridCurveMaker.board_coords(
+            board_shape=self.board_shape,
+            rings=self.rings,
+            board_width=self.board_width,
+            board_height=self.board_height)))
+
+        wm = context.window_manager
+        self._timer = wm.event_timer_add(0.01, window=context.window)
+        wm.progress_begin(0, 100)
+        wm.modal_handler_add(self)
+        return {"RUNNING_MODAL"}
+
+    def modal(self, context, event):
+        if event.type == "ESC":
+            # Closing the generator frees partial data.
+            self._steps.close()
+            self.end_modal(context)
+            return {"CANCELLED"}
+
+        if event.type != "TIMER":
+            return {"PASS_THROUGH"}
+
+        # Process cells until the time slice runs out.
+        deadline = time.perf_counter() + HexGridCurveMaker.time_slice
+        try:
+            while time.perf_counter() < deadline:
+                next(self._steps)
+                self._step_count = self._step_count + 1
+        except StopIteration as stop:
+            self.end_modal(context)
+            HexGridCurveMaker.link_curves(
+                collection=context.collection,
+                curves=stop.value,
+                location=context.scene.cursor.location)
+            return {"FINISHED"}
+        except Exception:
+            # The timer and progress bar are removed before the error is
+            # reported.
+            self.end_modal(context)
+            raise
+
+        percent = min(99, (100 * self._step_count) // self._step_total)
+        context.window_manager.progress_update(percent)
+        context.workspace.status_text_set(
+            "Hex Grid: %d%%, press Esc to cancel" % percent)
+        return {"RUNNING_MODAL"}
+
+    def end_modal(self, context):
+        wm = context.window_manager
+        wm.event_timer_remove(self._timer)
+        wm.progress_end()
+        context.workspace.status_text_set(None)
+
+    @staticmethod
+    def curve_steps(
+            rings=4,
+            cell_radius=0.5,
+            cell_margin=0.0325,
+            rounding=0.0,
+            straight_edge="FREE",
+            spline_type="BEZIER",
+            res_u=12,
+            output_type="CURVE",
+            fill_mode="BOTH",
+            extrude_thick=0.0,
+            extrude_off=0.0,
+            board_shape="HEXAGON",
+            board_width=8,
+            board_height=8,
+            mask_image="",
+            mask_threshold=0.5,
+            mask=None,
+            cell_order="AXIAL",
+            chunk_type="NONE",
+            chunk_count=2):
+
+        if board_shape == "MASK" and mask is None:
+            mask = HexGridCurveMaker.image_mask(
+                image_name=mask_image,
+                threshold=mask_threshold,
+                board_width=board_width,
+                board_height=board_height)
+            if mask is None:
+                raise ValueError(HexGridCurveMaker.check_mask_image(board_shape, mask_image))
+
+        coords = HexGridCurveMaker.board_coords(
+            board_shape=board_shape,
+            rings=rings,
+            board_width=board_width,
+            board_height=board_height,
+            mask=mask,
+            cell_order=cell_order)
+        chunks = HexGridCurveMaker.chunk_cells(
+            coords=coords,
+            chunk_type=chunk_type,
+            chunk_count=chunk_count)
+
+        # Chunks share the bounds of the whole grid, so that their UVs match.
+        bounds = HexGridCurveMaker.grid_bounds(coords, cell_radius)
+        pad = max(0.0, extrude_off)
+        bounds = (
+            bounds[0] - pad,
+            bounds[1] - pad,
+            bounds[2] + pad * 2.0,
+            bounds[3] + pad * 2.0)
+
+        if output_type == "MESH":
+            # One cell's outline is sampled, then instanced at each center.
+            knots = HexGridCurveMaker.cell_knots(
+                v=HexGridCurveMaker.cell_corners(
+                    cell_radius=cell_radius,
+                    cell_margin=cell_margin),
+                rounding=rounding,
+                straight_edge=straight_edge)
+            outline = HexGridCurveMaker.sample_outline(
+                knots=knots,
+                res_u=res_u,
+                offset=extrude_off)
+
+            meshes = []
+            try:
+                for cells in chunks:
+                    mesh_data = yield from HexGridCurveMaker.mesh_hex_steps(
+                        cells=cells,
+                        outline=outline,
+                        bounds=bounds,
+                        cell_radius=cell_radius,
+                        fill_mode=fill_mode,
+                        extrude_thick=extrude_thick)
+                    meshes.append(mesh_data)
+            except GeneratorExit:
+                # Generation was cancelled, remove partial data.
+                for mesh_data in meshes:
+                    bpy.data.meshes.remove(mesh_data)
+                raise
+
+            return meshes
+
+        # Curve chunks share the texture space of the whole grid.
+        texspace_location = (
+            bounds[0] + bounds[2] * 0.5,
+            bounds[1] + bounds[3] * 0.5,
+            0.0)
+        texspace_size = (
+            bounds[2] * 0.5,
+            bounds[3] * 0.5,
+            max(0.000001, extrude_thick))
+
+        curves = []
+        try:
+            for cells in chunks:
+                crv_data = bpy.data.curves.new("Hex.Grid", "CURVE")
+                crv_data.dimensions = "2D"
+                crv_data.fill_mode = fill_mode
+                crv_data.extrude = extrude_thick
+                crv_data.offset = extrude_off
+                crv_data.use_auto_texspace = False
+                crv_data.texspace_location = texspace_location
+                crv_data.texspace_size = texspace_size
+                curves.append(crv_data)
+
+                yield from HexGridCurveMaker.grid_hex_steps(
+                    crv_splines=crv_data.splines,
+                    cells=cells,
+                    cell_radius=cell_radius,
+                    cell_margin=cell_margin,
+                    rounding=rounding,
+                    straight_edge=straight_edge,
+                    spline_type=spline_type,
+                    res_u=res_u)
+        except GeneratorExit:
+            # Generation was cancelled, remove partial data.
+            for crv_data in curves:
+                bpy.data.curves.remove(crv_data)
+            raise
+
+        return curves
+
+    @staticmethod
+    def link_curves(
+            collection=None,
+            curves=None,
+            location=(0.0, 0.0, 0.0)):
+
+        if len(curves) == 1:
+            crv_obj = bpy.data.objects.new(curves[0].name, curves[0])
+            crv_obj.location = location
+            collection.objects.link(crv_obj)
+            return crv_obj
+        else:
+            # Chunks share the grid's coordinate space, so they are placed
+            # at the parent's origin.
+            parent_obj = bpy.data.objects.new("Hex.Grid", None)
+            parent_obj.location = location
+            collection.objects.link(parent_obj)
+
+            for crv_data in curves:
+                crv_obj = bpy.data.objects.new(crv_data.name, crv_data)
+                crv_obj.parent = parent_obj
+                collection.objects.link(crv_obj)
+            return parent_obj
+
+    @classmethod
+    def poll(cls, context):
+        return context.area.type == "VIEW_3D"
+
+    @staticmethod
+    def axial_coords(rings=1, cell_order="AXIAL") -> list:
+        verif_rings = 1 if rings < 1 else rings
+        i_max = verif_rings - 1
+        i_min = -i_max
+
+        if cell_order == "SPIRAL":
+            # Walk each ring in turn, so that a ring's cells are contiguous.
+            # See https://www.redblobgames.com/grids/hexagons/#rings-spiral
+            coords = [(0, 0)]
+            for ring in range(1, verif_rings):
+                i = -ring
+                j = ring
+                for direction in HexGridCurveMaker.ring_directions:
+                    for _ in range(0, ring):
+                        coords.append((i, j))
+                        i = i + direction[0]
+                        j = j + direction[1]
+            return coords
+
+        # See https://www.redblobgames.com/grids/hexagons/implementation.html#shape-hexagon
+        coords = []
+        for i in range(i_min, i_max + 1):
+            j_min = max(i_min, i_min - i)
+            j_max = min(i_max, i_max - i)
+            for j in range(j_min, j_max + 1):
+                coords.append((i, j))
+
+        return HexGridCurveMaker.order_coords(coords, cell_order)
+
+    @staticmethod
+    def board_coords(
+            board_shape="HEXAGON",
+            rings=1,
+            board_width=8,
+            board_height=8,
+            mask=None,
+            cell_order="AXIAL") -> list:
+
+        if board_shape not in ["RECTANGLE", "PARALLELOGRAM", "TRIANGLE", "MASK"]:
+            return HexGridCurveMaker.axial_coords(rings, cell_order)
+
+        verif_width = max(1, board_width)
+        verif_height = max(1, board_height)
+        i_min = -(verif_width // 2)
+        j_min = -(verif_height // 2)
+
+        # See https://www.redblobgames.com/grids/hexagons/implementation.html#map-shapes
+        coords = []
+        if board_shape == "PARALLELOGRAM":
+            for i in range(i_min, i_min + verif_width):
+                for j in range(j_min, j_min + verif_height):
+                    coords.append((i, j))
+        elif board_shape == "TRIANGLE":
+            # Shifted so that the center cell is near the origin.
+            shift = (verif_width - 1) // 3
+            for i in range(0, verif_width):
+                for j in range(0, verif_width - i):
+                    coords.append((i - shift, j - shift))
+        else:
+            # Rows are offset so that the board is a rectangle. Mask rows
+            # begin at the bottom, as image pixels do.
+            for row in range(0, verif_height):
+                j = j_min + row
+                mask_row = None
+                if mask is not None:
+                    if row >= len(mask):
+                        continue
+                    mask_row = mask[row]
+
+                i_start = i_min - (j // 2)
+                for col in range(0, verif_width):
+                    if mask_row is not None \
+                            and (col >= len(mask_row) or not mask_row[col]):
+                        continue
+                    coords.append((i_start + col, j))
+
+        return HexGridCurveMaker.order_coords(coords, cell_order)
+
+    @staticmethod
+    def check_mask_image(board_shape="HEXAGON", mask_image="") -> str:
+        # Returns a message if a mask board has no usable image.
+        if board_shape != "MASK":
+            return ""
+        image = bpy.data.images.get(mask_image)
+        if image is None:
+            return "Mask image \"%s\" not found" % mask_image
+        if image.size[0] < 1 or image.size[1] < 1:
+            return "Mask image \"%s\" has no pixels" % mask_image
+        return ""
+
+    @staticmethod
+    def image_mask(
+            image_name="",
+            threshold=0.5,
+            board_width=8,
+            board_height=8) -> list:
+
+        image = bpy.data.images.get(image_name)
+        if image is None or image.size[0] < 1 or image.size[1] < 1:
+            return None
+
+        # Pixels are read in bulk, then the nearest pixel to each cell is
+        # tested against the threshold.
+        img_width = image.size[0]
+        img_height = image.size[1]
+        channels = image.channels
+        pixels = array("f", [0.0]) * (img_width * img_height * channels)
+        image.pixels.foreach_get(pixels)
+
+        verif_width = max(1, board_width)
+        verif_height = max(1, board_height)
+        mask = []
+        for row in range(0, verif_height):
+            py = min(img_height - 1, int((row + 0.5) * img_height / verif_height))
+            mask_row = []
+            for col in range(0, verif_width):
+                px = min(img_width - 1, int((col + 0.5) * img_width / verif_width))
+                idx = (py * img_width + px) * channels
+                if channels >= 3:
+                    value = (pixels[idx] + pixels[idx + 1] + pixels[idx + 2]) / 3.0
+                else:
+                    value = pixels[idx]
+                if channels == 4 or channels == 2:
+                    value = value * pixels[idx + channels - 1]
+                mask_row.append(value >= threshold)
+            mask.append(mask_row)
+
+        return mask
+
+    @staticmethod
+    def order_coords(coords=None, cell_order="AXIAL") -> list:
+        if not coords or cell_order not in ["SPIRAL", "HILBERT", "MORTON"]:
+            return coords
+
+        if cell_order == "SPIRAL":
+            # Sorted by ring, then by angle counter clockwise from the
+            # upper left, as in the walk used by hexagon boards.
+            sqrt_3 = 3.0 ** 0.5
+            tau = math.tau
+            start = tau / 3.0 - 0.000001
+            coords.sort(key=lambda co: (
+                max(abs(co[0]), abs(co[1]), abs(co[0] + co[1])),
+                (math.atan2(1.5 * co[1], sqrt_3 * (co[0] + co[1] * 0.5)) - start) % tau))
+            return coords
+
+        # Coordinates are shifted to be non-negative, then sorted by
+        # their distance along a space filling curve.
+        i_min = min(co[0] for co in coords)
+        j_min = min(co[1] for co in coords)
+        span = max(
+            max(co[0] for co in coords) - i_min,
+            max(co[1] for co in coords) - j_min) + 1
+        side = 1
+        while side < span:
+            side = side * 2
+
+        if cell_order == "HILBERT":
+            coords.sort(key=lambda co: HexGridCurveMaker.hilbert_index(
+                side, co[0] - i_min, co[1] - j_min))
+        else:
+            coords.sort(key=lambda co: HexGridCurveMaker.morton_index(
+                co[0] - i_min, co[1] - j_min))
+
+        return coords
+
+    @staticmethod
+    def ring_cells(ring=0) -> range:
+        # Range of cell ids in a ring when cells are in spiral order.
+        if ring < 1:
+            return range(0, 1)
+        return range(3 * ring * (ring - 1) + 1, 3 * ring * (ring + 1) + 1)
+
+    @staticmethod
+    def hilbert_index(side=1, x=0, y=0) -> int:
+        # See https://en.wikipedia.org/wiki/Hilbert_curve#Applications_and_mapping_algorithms
+        d = 0
+        s = side // 2
+        while s > 0:
+            rx = 1 if (x & s) > 0 else 0
+            ry = 1 if (y & s) > 0 else 0
+            d = d + s * s * ((3 * rx) ^ ry)
+
+            # Rotate quadrant.
+            if ry == 0:
+                if rx == 1:
+                    x = side - 1 - x
+                    y = side - 1 - y
+                x, y = y, x
+            s = s // 2
+        return d
+
+    @staticmethod
+    def morton_index(x=0, y=0) -> int:
+        d = 0
+        bit = 0
+        while (x >> bit) > 0 or (y >> bit) > 0:
+            d = d | (((x >> bit) & 1) << (2 * bit)) | (((y >> bit) & 1) << (2 * bit + 1))
+            bit = bit + 1
+        return d
+
+    @staticmethod
+    def chunk_cells(
+            coords=None,
+            chunk_type="NONE",
+            chunk_count=1) -> list:
+
+        # A cell's id is its index in the full coordinate list, so that ids
+        # are consistent no matter how the grid is split.
+        cells = [(cell_id, co[0], co[1]) for cell_id, co in enumerate(coords)]
+        verif_count = max(1, chunk_count)
+        if chunk_type not in ["REGION", "SECTOR"] or verif_count < 2 or not cells:
+            return [cells]
+
+        i_lo = min(cell[1] for cell in cells)
+        j_lo = min(cell[2] for cell in cells)
+        i_span = max(cell[1] for cell in cells) - i_lo + 1
+        j_span = max(cell[2] for cell in cells) - j_lo + 1
+        sqrt_3 = 1.7320508075688772 # 3.0 ** 0.5
+        tau = math.tau
+
+        chunks = {}
+        for cell in cells:
+            i = cell[1]
+            j = cell[2]
+
+            if chunk_type == "SECTOR":
+                # Angle of the cell center, independent of cell radius.
+                ang = math.atan2(1.5 * j, sqrt_3 * (i + j * 0.5)) % tau
+                key = min(int(ang * verif_count / tau), verif_count - 1)
+            else:
+                ci = (i - i_lo) * verif_count // i_span
+                cj = (j - j_lo) * verif_count // j_span
+                key = ci * verif_count + cj
+
+            if key in chunks:
+                chunks[key].append(cell)
+            else:
+                chunks[key] = [cell]
+
+        return [chunks[key] for key in sorted(chunks)]
+
+    @staticmethod
+    def grid_bounds(coords=None, cell_radius=0.5) -> tuple:
+        # Left, bottom, width and height of the cells' bounding box.
+        verif_rad = max(0.000001, cell_radius)
+        sqrt_3 = 3.0 ** 0.5
+        extent = sqrt_3 * verif_rad
+        if not coords:
+            return (-0.5 * extent, -verif_rad, extent, 2.0 * verif_rad)
+
+        xs = [co[0] + co[1] * 0.5 for co in coords]
+        ys = [co[1] for co in coords]
+        left = (min(xs) - 0.5) * extent
+        bottom = min(ys) * 1.5 * verif_rad - verif_rad
+        width = (max(xs) + 0.5) * extent - left
+        height = max(ys) * 1.5 * verif_rad + verif_rad - bottom
+        return (left, bottom, width, height)
+
+    @staticmethod
+    def run_steps(steps):
+        while True:
+            try:
+                next(steps)
+            except StopIteration as stop:
+                return stop.value
+
+    @staticmethod
+    def grid_hex(**kwargs):
+        return HexGridCurveMaker.run_steps(
+            HexGridCurveMaker.grid_hex_steps(**kwargs))
+
+    @staticmethod
+    def grid_hex_steps(
+            crv_splines=None,
+            cells=None,
+            cell_radius=0.5,
+            cell_margin=0.0325,
+            rounding=0.0,
+            straight_edge="FREE",
+            spline_type="BEZIER",
+            res_u=12):
         # Constants.
         eps = 0.000001
-        o_3 = 1.0 / 3.0
-        t_3 = 2.0 / 3.0
         sqrt_3 = 1.7320508075688772 # 3.0 ** 0.5
-        handle_fac = t_3
-        one_h_fac = 1.0 - handle_fac
 
         # Unpack arguments.
-        verif_rings = 1 if self.rings < 1 else self.rings
-        verif_rad = max(eps, self.cell_radius)
+        verif_rad = max(eps, cell_radius)
+        verif_rounding = rounding
+        is_poly = verif_rounding <= 0.0 and spline_type == "POLY"
+
+        # Intermediate calculations.
+        extent = sqrt_3 * verif_rad
+        rad_1_5 = verif_rad * 1.5
+        half_ext = extent * 0.5
+
+        for cell in cells:
+            i = cell[1]
+            j = cell[2]
+
+            # Hexagon center.
+            x = i * extent + j * half_ext
+            y = j * rad_1_5
+
+            v = HexGridCurveMaker.cell_corners(
+                x=x,
+                y=y,
+                cell_radius=verif_rad,
+                cell_margin=cell_margin)
+
+            if is_poly:
+                # Poly points have a fourth, weight, component.
+                spline = crv_splines.new("POLY")
+                spline.use_cyclic_u = True
+                spline.points.add(5)
+                spline.points.foreach_set("co", [
+                    v[0][0], v[0][1], 0.0, 1.0,
+                    v[1][0], v[1][1], 0.0, 1.0,
+                    v[2][0], v[2][1], 0.0, 1.0,
+                    v[3][0], v[3][1], 0.0, 1.0,
+                    v[4][0], v[4][1], 0.0, 1.0,
+                    v[5][0], v[5][1], 0.0, 1.0])
+                yield
+                continue
+
+            knots = HexGridCurveMaker.cell_knots(
+                v=v,
+                rounding=verif_rounding,
+                straight_edge=straight_edge)
+
+            spline = crv_splines.new("BEZIER")
+            spline.use_cyclic_u = True
+            spline.resolution_u = res_u
+            bz_pts = spline.bezier_points
+            bz_pts.add(len(knots) - 1)
+
+            for kn, knot in zip(bz_pts, knots):
+                kn.co = knot["co"]
+                kn.handle_left_type = knot["handle_left_type"]
+                kn.handle_right_type = knot["handle_right_type"]
+                kn.handle_left = knot["handle_left"]
+                kn.handle_right = knot["handle_right"]
+
+            yield
+
+        return crv_splines
+
+    @staticmethod
+    def cell_corners(
+            x=0.0,
+            y=0.0,
+            cell_radius=0.5,
+            cell_margin=0.0325) -> list:
+        eps = 0.000001
+        sqrt_3 = 1.7320508075688772 # 3.0 ** 0.5
+
         # Allow negative cell margins so that the seed of life geometric
         # pattern can be created.
-        verif_margin = self.cell_margin
-        verif_rounding = self.rounding
-        straight_handle_type = self.straight_edge
+        pad_rad = max(eps, cell_radius - cell_margin)
+
+        # Added to hexagon center to find corners.
+        half_rad = pad_rad * 0.5
+        rad_rt3_2 = half_rad * sqrt_3
+
+        # Hexagon edges.
+        left = x - rad_rt3_2
+        right = x + rad_rt3_2
+        top = y + half_rad
+        bottom = y - half_rad
+
+        # Hexagon vertices, beginning at top center
+        # moving counter clockwise.
+        return [
+            (x, y + pad_rad, 0.0),
+            (left, top, 0.0),
+            (left, bottom, 0.0),
+            (x, y - pad_rad, 0.0),
+            (right, bottom, 0.0),
+            (right, top, 0.0) ]
+
+    @staticmethod
+    def cell_knots(
+            v=None,
+            rounding=0.0,
+            straight_edge="FREE") -> list:
+        # Constants.
+        o_3 = 1.0 / 3.0
+        t_3 = 2.0 / 3.0
+        handle_fac = t_3
+        one_h_fac = 1.0 - handle_fac
+
+        verif_rounding = rounding
+        straight_handle_type = straight_edge
+        one_round = 1.0 - verif_rounding
 
         is_straight = verif_rounding <= 0.0
         is_circle = verif_rounding >= 1.0
         if is_straight and straight_handle_type == "ALIGNED":
             straight_handle_type = "VECTOR"
-        
+
         corner_handle_type = "FREE"
         if straight_handle_type == "ALIGNED":
             corner_handle_type = "ALIGNED"
 
+        # Each knot also records whether the segment that follows it is a
+        # straight line, so that it can be sampled without subdivision.
+        knots = []
+
+        if is_straight:
+            for kn_idx_curr in range(0, 6):
+                kn_idx_prev = (kn_idx_curr - 1) % 6
+                kn_idx_next = (kn_idx_curr + 1) % 6
+
+                co_curr = v[kn_idx_curr]
+                co_prev = v[kn_idx_prev]
+                co_next = v[kn_idx_next]
+
+                knots.append({
+                    "co": co_curr,
+                    "handle_left_type": straight_handle_type,
+                    "handle_right_type": straight_handle_type,
+                    "handle_left": (
+                        t_3 * co_curr[0] + o_3 * co_prev[0],
+                        t_3 * co_curr[1] + o_3 * co_prev[1],
+                        t_3 * co_curr[2] + o_3 * co_prev[2]),
+                    "handle_right": (
+                        t_3 * co_curr[0] + o_3 * co_next[0],
+                        t_3 * co_curr[1] + o_3 * co_next[1],
+                        t_3 * co_curr[2] + o_3 * co_next[2]),
+                    "straight_next": True})
+            return knots
+
+        # Calculate midpoints.
+        mp = [(0.0, 0.0, 0.0)] * 6
+        for mp_idx in range(0, 6):
+            mp_idx_next = (mp_idx + 1) % 6
+            v_curr = v[mp_idx]
+            v_next = v[mp_idx_next]
+            mp[mp_idx] = (
+                (v_curr[0] + v_next[0]) * 0.5,
+                (v_curr[1] + v_next[1]) * 0.5,
+                (v_curr[2] + v_next[2]) * 0.5)
+
+        if is_circle:
+            for kn_idx_curr in range(0, 6):
+                v_idx_next = (kn_idx_curr + 1) % 6
+                v_prev = v[kn_idx_curr]
+                v_next = v[v_idx_next]
+                co = mp[kn_idx_curr]
+
+                knots.append({
+                    "co": co,
+                    "handle_left_type": corner_handle_type,
+                    "handle_right_type": corner_handle_type,
+                    "handle_left": (
+                        one_h_fac * co[0] + handle_fac * v_prev[0],
+                        one_h_fac * co[1] + handle_fac * v_prev[1],
+                        one_h_fac * co[2] + handle_fac * v_prev[2]),
+                    "handle_right": (
+                        one_h_fac * co[0] + handle_fac * v_next[0],
+                        one_h_fac * co[1] + handle_fac * v_next[1],
+                        one_h_fac * co[2] + handle_fac * v_next[2]),
+                    "straight_next": False})
+            return knots
+
+        for kn_idx_curr in range(0, 12):
+            v_idx_curr = kn_idx_curr // 2
+            v_curr = v[v_idx_curr]
+
+            is_even = kn_idx_curr % 2 != 1
+            if is_even:
+                v_idx_prev = (v_idx_curr - 1) % 6
+                v_prev = v[v_idx_prev]
+                mp_prev = mp[v_idx_prev]
+
+                co_curr = (
+                    one_round * v_curr[0] + verif_rounding * mp_prev[0],
+                    one_round * v_curr[1] + verif_rounding * mp_prev[1],
+                    one_round * v_curr[2] + verif_rounding * mp_prev[2])
+
+                co_prev = (
+                    one_round * v_prev[0] + verif_rounding * mp_prev[0],
+                    one_round * v_prev[1] + verif_rounding * mp_prev[1],
+                    one_round * v_prev[2] + verif_rounding * mp_prev[2])
+
+                knots.append({
+                    "co": co_curr,
+                    "handle_left_type": straight_handle_type,
+                    "handle_right_type": corner_handle_type,
+                    "handle_left": (
+                        t_3 * co_curr[0] + o_3 * co_prev[0],
+                        t_3 * co_curr[1] + o_3 * co_prev[1],
+                        t_3 * co_curr[2] + o_3 * co_prev[2]),
+                    "handle_right": (
+                        one_h_fac * co_curr[0] + handle_fac * v_curr[0],
+                        one_h_fac * co_curr[1] + handle_fac * v_curr[1],
+                        one_h_fac * co_curr[2] + handle_fac * v_curr[2]),
+                    "straight_next": False})
+            else:
+                v_idx_next = (v_idx_curr + 1) % 6
+                mp_next = mp[v_idx_curr]
+                v_next = v[v_idx_next]
+
+                co_curr = (
+                    one_round * v_curr[0] + verif_rounding * mp_next[0],
+                    one_round * v_curr[1] + verif_rounding * mp_next[1],
+                    one_round * v_curr[2] + verif_rounding * mp_next[2])
+
+                co_next = (
+                    one_round * v_next[0] + verif_rounding * mp_next[0],
+                    one_round * v_next[1] + verif_rounding * mp_next[1],
+                    one_round * v_next[2] + verif_rounding * mp_next[2])
+
+                knots.append({
+                    "co": co_curr,
+                    "handle_left_type": corner_handle_type,
+                    "handle_right_type": straight_handle_type,
+                    "handle_left": (
+                        one_h_fac * co_curr[0] + handle_fac * v_curr[0],
+                        one_h_fac * co_curr[1] + handle_fac * v_curr[1],
+                        one_h_fac * co_curr[2] + handle_fac * v_curr[2]),
+                    "handle_right": (
+                        t_3 * co_curr[0] + o_3 * co_next[0],
+                        t_3 * co_curr[1] + o_3 * co_next[1],
+                        t_3 * co_curr[2] + o_3 * co_next[2]),
+                    "straight_next": True})
+
+        return knots
+
+    @staticmethod
+    def sample_outline(
+            knots=None,
+            res_u=12,
+            offset=0.0) -> list:
+
+        # Each curved segment is sampled res_u times, as curve evaluation
+        # would. Straight segments only need their first knot.
+        verif_res = max(1, res_u)
+        points = []
+        knot_count = len(knots)
+        for kn_idx in range(0, knot_count):
+            knot = knots[kn_idx]
+            knot_next = knots[(kn_idx + 1) % knot_count]
+            p0 = knot["co"]
+            p1 = knot["handle_right"]
+            p2 = knot_next["handle_left"]
+            p3 = knot_next["co"]
+
+            points.append((p0[0], p0[1]))
+            if knot["straight_next"]:
+                continue
+
+            for step in range(1, verif_res):
+                t = step / verif_res
+                u = 1.0 - t
+                b0 = u * u * u
+                b1 = 3.0 * u * u * t
+                b2 = 3.0 * u * t * t
+                b3 = t * t * t
+                points.append((
+                    b0 * p0[0] + b1 * p1[0] + b2 * p2[0] + b3 * p3[0],
+                    b0 * p0[1] + b1 * p1[1] + b2 * p2[1] + b3 * p3[1]))
+
+        if offset == 0.0:
+            return points
+
+        # Move each point along the bisector of its edges' outward normals.
+        # Points wind counter-clockwise, so the outward normal of an edge
+        # (dx, dy) is (dy, -dx). As with curve offsets, the distance is
+        # divided by the cosine of half the turn, so that edges stay parallel
+        # to the originals.
+        point_count = len(points)
+        normals = []
+        for pt_idx in range(0, point_count):
+            pt_curr = points[pt_idx]
+            pt_next = points[(pt_idx + 1) % point_count]
+            nx = pt_next[1] - pt_curr[1]
+            ny = pt_curr[0] - pt_next[0]
+            mag_sq = nx * nx + ny * ny
+            inv_mag = 0.0 if mag_sq == 0.0 else 1.0 / math.sqrt(mag_sq)
+            normals.append((nx * inv_mag, ny * inv_mag))
+
+        offset_points = []
+        for pt_idx in range(0, point_count):
+            pt_curr = points[pt_idx]
+            n_prev = normals[pt_idx - 1]
+            n_next = normals[pt_idx]
+
+            bx = n_prev[0] + n_next[0]
+            by = n_prev[1] + n_next[1]
+            mag_sq = bx * bx + by * by
+            if mag_sq == 0.0:
+                offset_points.append(pt_curr)
+                continue
+            inv_mag = 1.0 / math.sqrt(mag_sq)
+            bx = bx * inv_mag
+            by = by * inv_mag
+            cos_half = max(0.000001, bx * n_next[0] + by * n_next[1])
+            miter = offset / cos_half
+            offset_points.append((
+                pt_curr[0] + bx * miter,
+                pt_curr[1] + by * miter))
+
+        return offset_points
+
+    @staticmethod
+    def mesh_hex_steps(
+            name="Hex.Grid",
+            cells=None,
+            outline=None,
+            bounds=None,
+            cell_radius=0.5,
+            fill_mode="BOTH",
+            extrude_thick=0.0):
+        # Constants.
+        eps = 0.000001
+        sqrt_3 = 1.7320508075688772 # 3.0 ** 0.5
+
         # Intermediate calculations.
+        verif_rad = max(eps, cell_radius)
         extent = sqrt_3 * verif_rad
         rad_1_5 = verif_rad * 1.5
-        pad_rad = max(eps, verif_rad - verif_margin)
         half_ext = extent * 0.5
-        one_round = 1.0 - verif_rounding
+        verif_thick = max(0.0, extrude_thick)
+        is_extruded = verif_thick > 0.0
 
-        # Added to hexagon center to find corners.
-        half_rad = pad_rad * 0.5
-        rad_rt3_2 = half_rad * sqrt_3
+        # UVs span the given bounds, like generated curve coordinates.
+        if bounds is None:
+            bounds = HexGridCurveMaker.grid_bounds(
+                [(cell[1], cell[2]) for cell in cells], verif_rad)
+        left_bound = bounds[0]
+        bottom_bound = bounds[1]
+        x_inv = 1.0 / max(eps, bounds[2])
+        y_inv = 1.0 / max(eps, bounds[3])
 
-        i_max = verif_rings - 1
-        i_min = -i_max
+        # Without extrusion, any fill mode other than none fills the cell.
+        use_front = fill_mode in ["FRONT", "BOTH"] \
+            or (not is_extruded and fill_mode == "BACK")
+        use_back = is_extruded and fill_mode in ["BACK", "BOTH"]
 
-        crv_data = bpy.data.curves.new("Hex.Grid", "CURVE")
-        crv_data.dimensions = "2D"
-        crv_data.fill_mode = self.fill_mode
-        crv_data.extrude = self.extrude_thick
-        crv_data.offset = self.extrude_off
-        crv_splines = crv_data.splines
+        # The outline is instanced at each center, on one layer, or on a
+        # bottom and top layer when extruded.
+        layers = [-verif_thick, verif_thick] if is_extruded else [0.0]
+        pt_count = len(outline)
+        cell_vert_count = pt_count * len(layers)
 
-        # See https://www.redblobgames.com/grids/hexagons/implementation.html#shape-hexagon
-        for i in range(i_min, i_max + 1):
-            j_min = max(i_min, i_min - i)
-            j_max = min(i_max, i_max - i)
-            i_ext = i * extent
+        co = array("f")
+        loop_vert = array("i")
+        loop_start = array("i")
+        edges = array("i")
+        face_cells = array("i")
 
-            for j in range(j_min, j_max + 1):
-                # Hexagon center.
-                x = i_ext + j * half_ext
-                y = j * rad_1_5
-
-                # Hexagon edges.
-                left = x - rad_rt3_2
-                right = x + rad_rt3_2
-                top = y + half_rad
-                bottom = y - half_rad
-
-                # Hexagon vertices, beginning at top center
-                # moving counter clockwise.
-                v = [
-                    (x, y + pad_rad, 0.0),
-                    (left, top, 0.0),
-                    (left, bottom, 0.0),
-                    (x, y - pad_rad, 0.0),
-                    (right, bottom, 0.0),
-                    (right, top, 0.0) ]
-
-                spline = crv_splines.new("BEZIER")
-                spline.use_cyclic_u = True
-                spline.resolution_u = self.res_u
-                bz_pts = spline.bezier_points
-
-                if is_straight:
-                    bz_pts.add(5)
-
-                    kn_idx_curr = 0
-                    for kn in bz_pts:
-                        kn_idx_prev = (kn_idx_curr - 1) % 6
-                        kn_idx_next = (kn_idx_curr + 1) % 6
-
-                        co_curr = v[kn_idx_curr]
-                        co_prev = v[kn_idx_prev]
-                        co_next = v[kn_idx_next]
-
-                        kn.co = co_curr
-                        kn.handle_left_type = straight_handle_type
-                        kn.handle_right_type = straight_handle_type
-                        kn.handle_left = (
-                            t_3 * co_curr[0] + o_3 * co_prev[0],
-                            t_3 * co_curr[1] + o_3 * co_prev[1],
-                            t_3 * co_curr[2] + o_3 * co_prev[2])
-                        kn.handle_right = (
-                            t_3 * co_curr[0] + o_3 * co_next[0],
-                            t_3 * co_curr[1] + o_3 * co_next[1],
-                            t_3 * co_curr[2] + o_3 * co_next[2])
-
-                        kn_idx_curr = kn_idx_curr + 1
-                else:
-                    # Calculate midpoints.
-                    mp = [(0.0, 0.0, 0.0)] * 6
-                    for mp_idx in range(0, 6):
-                        mp_idx_next = (mp_idx + 1) % 6
-                        v_curr = v[mp_idx]
-                        v_next = v[mp_idx_next]
-                        mp[mp_idx] = (
-                            (v_curr[0] + v_next[0]) * 0.5,
-                            (v_curr[1] + v_next[1]) * 0.5,
-                            (v_curr[2] + v_next[2]) * 0.5)
-
-                    if is_circle:
-                        bz_pts.add(5)
-
-                        kn_idx_curr = 0
-                        for kn in bz_pts:
-                            v_idx_next = (kn_idx_curr + 1) % 6                            
-                            v_prev = v[kn_idx_curr]
-                            v_next = v[v_idx_next]
-                            co = mp[kn_idx_curr]
-
-                            kn.co = co
-                            kn.handle_left_type = corner_handle_type
-                            kn.handle_right_type = corner_handle_type
-                            kn.handle_left = (
-                                    one_h_fac * co[0] + handle_fac * v_prev[0],
-                                    one_h_fac * co[1] + handle_fac * v_prev[1],
-                                    one_h_fac * co[2] + handle_fac * v_prev[2])
-                            kn.handle_right = (
-                                    one_h_fac * co[0] + handle_fac * v_next[0],
-                                    one_h_fac * co[1] + handle_fac * v_next[1],
-                                    one_h_fac * co[2] + handle_fac * v_next[2])
-                            kn_idx_curr = kn_idx_curr + 1
-                    else:
-                        bz_pts.add(11)
-
-                        kn_idx_curr = 0
-                        for kn in bz_pts:
-                            v_idx_curr = kn_idx_curr // 2
-                            v_curr = v[v_idx_curr]
-                            
-                            is_even = kn_idx_curr % 2 != 1
-                            if is_even:
-                                v_idx_prev = (v_idx_curr - 1) % 6
-                                v_prev = v[v_idx_prev]
-                                mp_prev = mp[v_idx_prev]
-
-                                co_curr = (
-                                    one_round * v_curr[0] + verif_rounding * mp_prev[0],
-                                    one_round * v_curr[1] + verif_rounding * mp_prev[1],
-                                    one_round * v_curr[2] + verif_rounding * mp_prev[2])
-                                
-                                co_prev = (
-                                    one_round * v_prev[0] + verif_rounding * mp_prev[0],
-                                    one_round * v_prev[1] + verif_rounding * mp_prev[1],
-                                    one_round * v_prev[2] + verif_rounding * mp_prev[2])
-                                
-                                kn.co = co_curr
-                                kn.handle_left_type = straight_handle_type
-                                kn.handle_right_type = corner_handle_type
-                                kn.handle_left = (
-                                    t_3 * co_curr[0] + o_3 * co_prev[0],
-                                    t_3 * co_curr[1] + o_3 * co_prev[1],
-                                    t_3 * co_curr[2] + o_3 * co_prev[2])
-                                kn.handle_right = (
-                                    one_h_fac * co_curr[0] + handle_fac * v_curr[0],
-                                    one_h_fac * co_curr[1] + handle_fac * v_curr[1],
-                                    one_h_fac * co_curr[2] + handle_fac * v_curr[2])
-                            else:
-                                v_idx_next = (v_idx_curr + 1) % 6
-                                mp_next = mp[v_idx_curr]
-                                v_next = v[v_idx_next]
-
-                                co_curr = (
-                                    one_round * v_curr[0] + verif_rounding * mp_next[0],
-                                    one_round * v_curr[1] + verif_rounding * mp_next[1],
-                                    one_round * v_curr[2] + verif_rounding * mp_next[2])
-                                
-                                co_next = (
-                                    one_round * v_next[0] + verif_rounding * mp_next[0],
-                                    one_round * v_next[1] + verif_rounding * mp_next[1],
-                                    one_round * v_next[2] + verif_rounding * mp_next[2])
-
-                                kn.co = co_curr
-                                kn.handle_left_type = corner_handle_type
-                                kn.handle_right_type = straight_handle_type
-                                kn.handle_left = (
-                                    one_h_fac * co_curr[0] + handle_fac * v_curr[0],
-                                    one_h_fac * co_curr[1] + handle_fac * v_curr[1],
-                                    one_h_fac * co_curr[2] + handle_fac * v_curr[2])
-                                kn.handle_right = (
-                                    t_3 * co_curr[0] + o_3 * co_next[0],
-                                    t_3 * co_curr[1] + o_3 * co_next[1],
-                                    t_3 * co_curr[2] + o_3 * co_next[2])
-
-                            kn_idx_curr = kn_idx_curr + 1
-
-        crv_obj = bpy.data.objects.new(crv_data.name, crv_data)
-        crv_obj.location = context.scene.cursor.location
-        context.collection.objects.link(crv_obj)
-        return {"FINISHED"}
+        for cell in cells:
+            cell_id = cell[0]
+            i = cell[1]
+            j = cell[2]
+
+            # Hexagon center.
+            x = i * extent + j * half_ext
+            y = j * rad_1_5
+
+            v_start = len(co) // 3
+            for z in layers:
+                for pt in outline:
+                    co.extend((x + pt[0], y + pt[1], z))
+
+            top_start = v_start + cell_vert_count - pt_count
+            if use_front:
+                loop_start.append(len(loop_vert))
+                loop_vert.extend(range(top_start, top_start + pt_count))
+                face_cells.append(cell_id)
+
+            if use_back:
+                loop_start.append(len(loop_vert))
+                loop_vert.extend(range(v_start + pt_count - 1, v_start - 1, -1))
+                face_cells.append(cell_id)
+
+            if is_extruded:
+                for pt_idx in range(0, pt_count):
+                    pt_next = (pt_idx + 1) % pt_count
+                    loop_start.append(len(loop_vert))
+                    loop_vert.extend((
+                        v_start + pt_idx,
+                        v_start + pt_next,
+                        top_start + pt_next,
+                        top_start + pt_idx))
+                    face_cells.append(cell_id)
+            elif not use_front:
+                for pt_idx in range(0, pt_count):
+                    edges.extend((
+                        v_start + pt_idx,
+                        v_start + (pt_idx + 1) % pt_count))
+
+            yield
+
+        mesh_data = bpy.data.meshes.new(name)
+        mesh_data.vertices.add(len(co) // 3)
+        mesh_data.vertices.foreach_set("co", co)
+        mesh_data.edges.add(len(edges) // 2)
+        mesh_data.edges.foreach_set("vertices", edges)
+        mesh_data.loops.add(len(loop_vert))
+        mesh_data.loops.foreach_set("vertex_index", loop_vert)
+        mesh_data.polygons.add(len(loop_start))
+        mesh_data.polygons.foreach_set("loop_start", loop_start)
+        mesh_data.update(calc_edges=True)
+
+        if face_cells:
+            attr = mesh_data.attributes.new("cell_id", "INT", "FACE")
+            attr.data.foreach_set("value", face_cells)
+
+            uv = array("f", [0.0]) * (len(loop_vert) * 2)
+            for loop, vert_idx in enumerate(loop_vert):
+                uv[loop * 2] = (co[vert_idx * 3] - left_bound) * x_inv
+                uv[loop * 2 + 1] = (co[vert_idx * 3 + 1] - bottom_bound) * y_inv
+            uv_layer = mesh_data.uv_layers.new(name="UVMap")
+            uv_layer.data.foreach_set("uv", uv)
+
+        return mesh_data
 
-    @classmethod
-    def poll(cls, context):
-        return context.area.type == "VIEW_3D"
 
 def menu_func(self, context):
     self.layout.operator(HexGridCurveMaker.bl_idname, icon="SEQ_CHROMA_SCOPE")
+    self.layout.operator(
+        HexGridCurveMaker.bl_idname,
+        text="Hex Grid (Time-Sliced)",
+        icon="SEQ_CHROMA_SCOPE").use_modal = True
 
 def register():
     bpy.utils.register_class(HexGridCurveMaker)
@@ -1,13 +1,24 @@
 import bpy # type: ignore
-import bmesh # type: ignore
+import hashlib
+import heapq
+import json
 import math
 import mathutils # type: ignore
+import numpy as np # type: ignore
+import os
+import shutil
+import tempfile
+import time
+from array import array
+from collections import deque
+from bpy.app.handlers import persistent # type: ignore
 from bpy.props import ( # type: ignore
     BoolProperty,
     IntProperty,
     EnumProperty,
     FloatProperty,
-    FloatVectorProperty)
+    FloatVectorProperty,
+    StringProperty)
 
 
 bl_info = {
@@ -28,6 +39,67 @@ class HexGridMeshMaker(bpy.types.Operator):
     bl_label = "Hex Grid"
     bl_options = {"REGISTER", "UNDO"}
 
+    # Seconds of work done per timer event when time-sliced.
+    time_slice = 1.0 / 30.0
+
+    # Steps that walk around a ring of cells, starting from its upper left.
+    ring_directions = [(0, -1), (1, -1), (1, 0), (0, 1), (-1, 1), (-1, 0)]
+
+    # Generated geometry is cached on disk, with the least recently used
+    # entries removed once the cache exceeds its size in bytes. The cache
+    # can be moved to a shared or persistent directory by setting the
+    # HEX_GRID_CACHE_DIR environment variable. Unfinished writes older than
+    # the temporary age, in seconds, are assumed to be abandoned.
+    cache_dir = os.environ.get("HEX_GRID_CACHE_DIR") \
+        or os.path.join(tempfile.gettempdir(), "hex_grid_cache")
+    cache_max_bytes = 256 * 1024 * 1024
+    cache_temp_age = 60 * 60
+    cache_version = 2
+
+    # Arrays used to store a mesh.
+    mesh_array_names = [
+        "co",
+        "edges",
+        "loop_start",
+        "loop_vert",
+        "uv",
+        "cell_id",
+        "vert_cell_id",
+        "vert_top",
+        "edge_border",
+        "edge_cell_a",
+        "edge_cell_b",
+        "cells",
+        "cell_axial"]
+
+    # Cells of a mesh, in the order they were generated, and their axial
+    # coordinates are stored as custom properties. Vertices that are shared
+    # by merged cells belong to only one of them, so cells cannot be found
+    # from vertices alone.
+    cell_properties = [
+        ("cells", "hex_grid_cells"),
+        ("cell_axial", "hex_grid_axial")]
+
+    # Columns of the cell table, with their number of components. Centers
+    # are at the top of each cell, in the mesh's space, with the grid's
+    # transform applied. Heights are the extrusion along the grid's up axis.
+    cell_column_widths = {
+        "cell_id": 1,
+        "axial": 2,
+        "center": 3,
+        "height": 1,
+        "face_start": 1,
+        "face_count": 1}
+
+    # Integer attributes written by the generator, with their domain.
+    int_attributes = [
+        ("cell_id", "FACE"),
+        ("vert_cell_id", "POINT"),
+        ("vert_top", "POINT"),
+        ("edge_border", "EDGE"),
+        ("edge_cell_a", "EDGE"),
+        ("edge_cell_b", "EDGE")]
+
     rings: IntProperty(
         name="Rings",
         description="Number of rings in grid",
@@ -95,6 +167,28 @@ class HexGridMeshMaker(bpy.types.Operator):
         default="NGON",
         description="How to fill each hexagon cell") # type: ignore
 
+    rounding: FloatProperty(
+        name="Rounding",
+        description="Percentage by which to round corners of NGon and Tri Fan cells",
+        default=0.0,
+        step=1,
+        precision=3,
+        min=0.0,
+        max=1.0,
+        subtype="FACTOR") # type: ignore
+
+    corner_segments: IntProperty(
+        name="Corner Segments",
+        description="Number of edges in each rounded corner",
+        min=1,
+        soft_max=32,
+        default=4) # type: ignore
+
+    edge_attributes: BoolProperty(
+        name="Edge Attributes",
+        description="Store a border flag and the cells on either side of each wire edge",
+        default=False) # type: ignore
+
     extrude_lb: FloatProperty(
         name="Extrude Lower",
         description="Extrusion lower bound on the z axis",
@@ -118,7 +212,8 @@ class HexGridMeshMaker(bpy.types.Operator):
             ("UNIFORM", "Uniform", "Extrude by a uniform amount", 1),
             ("LINEAR", "Linear", "Linear gradient", 2),
             ("SPHERICAL", "Spherical", "Spherical gradient", 3),
-            ("CONIC", "Conic", "Conic gradient", 4)],
+            ("CONIC", "Conic", "Conic gradient", 4),
+            ("DISTANCE", "Hex Distance", "Gradient by the number of cells to the nearest seed cell", 5)],
         name="Terrain Type",
         default="UNIFORM",
         description="How to extrude each hexagon cell") # type: ignore
@@ -145,6 +240,30 @@ class HexGridMeshMaker(bpy.types.Operator):
         size=2,
         subtype="TRANSLATION") # type: ignore
 
+    seed_cells: StringProperty(
+        name="Seed Cells",
+        description="Axial coordinates of the cells that hex distance is measured from, "
+            "such as \"0, 0; 3, -1\"; if empty, the cell nearest to the origin is used",
+        default="") # type: ignore
+
+    distance_cost: FloatProperty(
+        name="Distance Cost",
+        description="Amount that noise adds to the cost of crossing a cell when measuring hex distance",
+        min=0.0,
+        soft_max=10.0,
+        step=1,
+        precision=3,
+        default=0.0) # type: ignore
+
+    distance_max: FloatProperty(
+        name="Distance Max",
+        description="Hex distance at which the upper bound is reached; if zero, the farthest cell is used",
+        min=0.0,
+        soft_max=64.0,
+        step=100,
+        precision=1,
+        default=0.0) # type: ignore
+
     noise_influence: FloatProperty(
         name="Noise Influence",
         description="Amount that noise contributes to the extrusion",
@@ -188,42 +307,374 @@ class HexGridMeshMaker(bpy.types.Operator):
         default="BLENDER",
         description="Underlying noise algorithm to use") # type: ignore
 
+    animate_noise: BoolProperty(
+        name="Animate Noise",
+        description="Recalculate noise heights on frame change, moving the noise offset by the speed each frame",
+        default=False) # type: ignore
+
+    noise_speed: FloatVectorProperty(
+        name="Noise Speed",
+        description="Offset added to noise input per frame",
+        default=(0.0, 0.0, 0.05),
+        step=1,
+        precision=3,
+        subtype="TRANSLATION") # type: ignore
+
+    board_shape: EnumProperty(
+        items=[
+            ("HEXAGON", "Hexagon", "Fill a hexagon with rings of cells", 1),
+            ("RECTANGLE", "Rectangle", "Fill a rectangle of width by height cells", 2),
+            ("PARALLELOGRAM", "Parallelogram", "Fill a parallelogram of width by height cells", 3),
+            ("TRIANGLE", "Triangle", "Fill a triangle with width cells to a side", 4),
+            ("MASK", "Image Mask", "Keep the cells of a width by height rectangle where the mask image is bright", 5)],
+        name="Board Shape",
+        default="HEXAGON",
+        description="Shape of the grid of cells") # type: ignore
+
+    board_width: IntProperty(
+        name="Board Width",
+        description="Cells per row for rectangular boards, or per side for triangles",
+        min=1,
+        soft_max=256,
+        default=8,
+        step=1) # type: ignore
+
+    board_height: IntProperty(
+        name="Board Height",
+        description="Rows of cells for rectangular boards",
+        min=1,
+        soft_max=256,
+        default=8,
+        step=1) # type: ignore
+
+    mask_image: StringProperty(
+        name="Mask Image",
+        description="Name of the image used to mask cells",
+        default="") # type: ignore
+
+    mask_threshold: FloatProperty(
+        name="Mask Threshold",
+        description="Least brightness of the mask image at a cell's center for the cell to be kept",
+        min=0.0,
+        max=1.0,
+        default=0.5) # type: ignore
+
+    cell_order: EnumProperty(
+        items=[
+            ("AXIAL", "Axial", "Order cells by column, then row", 1),
+            ("SPIRAL", "Spiral", "Order cells ring by ring, from the center outward", 2),
+            ("HILBERT", "Hilbert", "Order cells along a Hilbert curve over axial coordinates", 3),
+            ("MORTON", "Morton", "Order cells along a Z-order curve over axial coordinates", 4)],
+        name="Cell Order",
+        default="AXIAL",
+        description="Order in which cells, and their vertices and faces, are created") # type: ignore
+
+    chunk_type: EnumProperty(
+        items=[
+            ("NONE", "None", "Create a single object", 1),
+            ("REGION", "Region", "Split into N x N axial regions", 2),
+            ("SECTOR", "Sector", "Split into N sectors around the center", 3)],
+        name="Chunks",
+        default="NONE",
+        description="How to split the grid into separate objects") # type: ignore
+
+    chunk_count: IntProperty(
+        name="Chunk Count",
+        description="Regions per axis or number of sectors",
+        min=1,
+        soft_max=16,
+        default=2,
+        step=1) # type: ignore
+
+    use_modal: BoolProperty(
+        name="Time-Sliced",
+        description="Generate in batches without blocking the interface; press Esc to cancel",
+        default=False,
+        options={"SKIP_SAVE"}) # type: ignore
+
+    use_cache: BoolProperty(
+        name="Use Cache",
+        description="Load previously generated geometry from disk when all settings match",
+        default=False) # type: ignore
+
     def execute(self, context):
-        bm = bmesh.new()
+        error = HexGridMeshMaker.check_mask_image(self.board_shape, self.mask_image)
+        if error:
+            self.report({"ERROR"}, error)
+            return {"CANCELLED"}
+
+        meshes = HexGridMeshMaker.run_steps(HexGridMeshMaker.mesh_steps(
+            **self.as_keywords(ignore=("use_modal",))))
+        HexGridMeshMaker.link_meshes(
+            collection=context.collection,
+            meshes=meshes,
+            location=context.scene.cursor.location)
+        return {"FINISHED"}
+
+    def invoke(self, context, event):
+        if not self.use_modal:
+            return self.execute(context)
+
+        error = HexGridMeshMaker.check_mask_image(self.board_shape, self.mask_image)
+        if error:
+            self.report({"ERROR"}, error)
+            return {"CANCELLED"}
 
-        result = HexGridMeshMaker.grid_hex(
-            bm=bm,
+        # Extrusion is a second pass over each cell, skipped when both
+        # bounds are zero.
+        cell_count = len(HexGridMeshMaker.board_coords(
+            board_shape=self.board_shape,
             rings=self.rings,
-            cell_radius=self.cell_radius,
-            cell_margin=self.cell_margin,
-            face_type=self.face_type,
-            orientation=self.orientation,
-            merge_verts=self.merge_verts)
-
-        if self.face_type not in ["WIRE", "POINTS"]:
-            HexGridMeshMaker.extrude_hexagons(
-                bm=bm,
-                faces=result["faces"],
-                extrude_lb=self.extrude_lb,
-                extrude_ub=self.extrude_ub,
-                terrain_type=self.terrain_type,
-                noise_influence=self.noise_influence,
-                noise_scale=self.noise_scale,
-                noise_offset=self.noise_offset,
-                noise_basis=self.noise_basis,
-                origin=self.origin,
-                dest=self.destination,
-                merge_verts=self.merge_verts)
-
-        mesh_data = bpy.data.meshes.new("Hex.Grid")
-        bm.to_mesh(mesh_data)
-        bm.free()
-
-        mesh_obj = bpy.data.objects.new(mesh_data.name, mesh_data)
-        mesh_obj.location = context.scene.cursor.location
-        context.collection.objects.link(mesh_obj)
+            board_width=self.board_width,
+            board_height=self.board_height))
+        if self.face_type not in ["WIRE", "POINTS"] \
+                and max(self.extrude_lb, self.extrude_ub) >= 0.000001:
+            cell_count = cell_count * 2
+
+        self._steps = HexGridMeshMaker.mesh_steps(
+            **self.as_keywords(ignore=("use_modal",)))
+        self._step_count = 0
+        self._step_total = max(1, cell_count)
+
+        wm = context.window_manager
+        self._timer = wm.event_timer_add(0.01, window=context.window)
+        wm.progress_begin(0, 100)
+        wm.modal_handler_add(self)
+        return {"RUNNING_MODAL"}
+
+    def modal(self, context, event):
+        if event.type == "ESC":
+            # Closing the generator frees partial data.
+            self._steps.close()
+            self.end_modal(context)
+            return {"CANCELLED"}
+
+        if event.type != "TIMER":
+            return {"PASS_THROUGH"}
+
+        # Process cells until the time slice runs out.
+        deadline = time.perf_counter() + HexGridMeshMaker.time_slice
+        try:
+            while time.perf_counter() < deadline:
+                next(self._steps)
+                self._step_count = self._step_count + 1
+        except StopIteration as stop:
+            self.end_modal(context)
+            HexGridMeshMaker.link_meshes(
+                collection=context.collection,
+                meshes=stop.value,
+                location=context.scene.cursor.location)
+            return {"FINISHED"}
+        except Exception:
+            # The timer and progress bar are removed before the error is
+            # reported.
+            self.end_modal(context)
+            raise
+
+        percent = min(99, (100 * self._step_count) // self._step_total)
+        context.window_manager.progress_update(percent)
+        context.workspace.status_text_set(
+            "Hex Grid: %d%%, press Esc to cancel" % percent)
+        return {"RUNNING_MODAL"}
+
+    def end_modal(self, context):
+        wm = context.window_manager
+        wm.event_timer_remove(self._timer)
+        wm.progress_end()
+        context.workspace.status_text_set(None)
 
-        return {"FINISHED"}
+    @staticmethod
+    def mesh_steps(
+            rings=4,
+            cell_radius=0.5,
+            cell_margin=0.0325,
+            orientation=0.0,
+            transform=None,
+            merge_verts=False,
+            face_type="NGON",
+            rounding=0.0,
+            corner_segments=4,
+            edge_attributes=False,
+            extrude_lb=0.0,
+            extrude_ub=0.0,
+            terrain_type="UNIFORM",
+            origin=(-1.0, -1.0),
+            destination=(1.0, 1.0),
+            seed_cells="",
+            distance_cost=0.0,
+            distance_max=0.0,
+            noise_influence=0.0,
+            noise_scale=1.0,
+            noise_offset=(0.0, 0.0, 0.0),
+            noise_basis="BLENDER",
+            animate_noise=False,
+            noise_speed=(0.0, 0.0, 0.05),
+            board_shape="HEXAGON",
+            board_width=8,
+            board_height=8,
+            mask_image="",
+            mask_threshold=0.5,
+            mask=None,
+            cell_order="AXIAL",
+            chunk_type="NONE",
+            chunk_count=2,
+            use_cache=False):
+
+        # Settings are gathered before any other local is assigned.
+        params = dict(locals())
+        del params["use_cache"]
+        del params["mask"]
+
+        # A transform is stored as a flat list of 16 numbers, row by row.
+        transform = HexGridMeshMaker.flat_matrix(transform)
+        if transform is None:
+            del params["transform"]
+        else:
+            params["transform"] = transform
+
+        # Settings are stored on each mesh so that it can be updated later.
+        settings = HexGridMeshMaker.settings_dict(params)
+        settings["verif_merge"] = int(merge_verts
+            and max(0.0, cell_margin) == 0.0
+            and face_type != "PENTA3"
+            and not HexGridMeshMaker.is_rounded(face_type, rounding))
+
+        # An image mask is read up front, so that the cache is keyed by the
+        # mask rather than by the image's name.
+        if board_shape == "MASK" and mask is None:
+            mask = HexGridMeshMaker.image_mask(
+                image_name=mask_image,
+                threshold=mask_threshold,
+                board_width=board_width,
+                board_height=board_height)
+            if mask is None:
+                raise ValueError(HexGridMeshMaker.check_mask_image(board_shape, mask_image))
+
+        cache_key = None
+        if use_cache:
+            cache_key = HexGridMeshMaker.cache_key(dict(params, mask=mask))
+            cached = HexGridMeshMaker.cache_load(cache_key)
+            if cached is not None:
+                meshes = []
+                for arrays in cached:
+                    mesh_data = HexGridMeshMaker.mesh_from_arrays("Hex.Grid", arrays)
+                    mesh_data["hex_grid"] = settings
+                    meshes.append(mesh_data)
+                return meshes
+
+        coords = HexGridMeshMaker.board_coords(
+            board_shape=board_shape,
+            rings=rings,
+            board_width=board_width,
+            board_height=board_height,
+            mask=mask,
+            cell_order=cell_order)
+        bounds = HexGridMeshMaker.grid_bounds(coords, cell_radius)
+        cell_lookup = {}
+        for cell_id, co in enumerate(coords):
+            cell_lookup[co] = cell_id
+        chunks = HexGridMeshMaker.chunk_cells(
+            coords=coords,
+            chunk_type=chunk_type,
+            chunk_count=chunk_count)
+
+        # Terrain is found over the whole grid, so that seeds, the nearest
+        # cell to the origin and the farthest distance do not depend on how
+        # the grid is split. Heights are indexed by cell id.
+        grid_heights = None
+        if face_type not in ["WIRE", "POINTS"] and not merge_verts:
+            grid_heights = HexGridMeshMaker.cell_heights(
+                points=HexGridMeshMaker.cell_centers(coords, cell_radius, orientation),
+                extrude_lb=extrude_lb,
+                extrude_ub=extrude_ub,
+                terrain_type=terrain_type,
+                noise_influence=noise_influence,
+                noise_scale=noise_scale,
+                noise_offset=noise_offset,
+                noise_basis=noise_basis,
+                origin=origin,
+                dest=destination,
+                axial=coords,
+                seed_cells=seed_cells,
+                distance_cost=distance_cost,
+                distance_max=distance_max)
+
+        meshes = []
+        chunk_arrays = []
+        try:
+            for cells in chunks:
+                grid = yield from HexGridMeshMaker.grid_hex_steps(
+                    rings=rings,
+                    cells=cells,
+                    cell_lookup=cell_lookup,
+                    bounds=bounds,
+                    cell_radius=cell_radius,
+                    cell_margin=cell_margin,
+                    face_type=face_type,
+                    rounding=rounding,
+                    corner_segments=corner_segments,
+                    orientation=orientation,
+                    transform=transform,
+                    merge_verts=merge_verts,
+                    edge_attributes=edge_attributes)
+
+                if face_type not in ["WIRE", "POINTS"]:
+                    grid = yield from HexGridMeshMaker.extrude_hexagons_steps(
+                        grid=grid,
+                        extrude_lb=extrude_lb,
+                        extrude_ub=extrude_ub,
+                        terrain_type=terrain_type,
+                        noise_influence=noise_influence,
+                        noise_scale=noise_scale,
+                        noise_offset=noise_offset,
+                        noise_basis=noise_basis,
+                        origin=origin,
+                        dest=destination,
+                        seed_cells=seed_cells,
+                        distance_cost=distance_cost,
+                        distance_max=distance_max,
+                        grid_heights=grid_heights,
+                        merge_verts=merge_verts)
+
+                arrays = HexGridMeshMaker.arrays_from_grid(grid)
+                mesh_data = HexGridMeshMaker.mesh_from_arrays("Hex.Grid", arrays)
+                mesh_data["hex_grid"] = settings
+                meshes.append(mesh_data)
+                chunk_arrays.append(arrays)
+        except GeneratorExit:
+            # Generation was cancelled, remove partial data.
+            for mesh_data in meshes:
+                bpy.data.meshes.remove(mesh_data)
+            raise
+
+        if cache_key is not None:
+            HexGridMeshMaker.cache_save(cache_key, chunk_arrays)
+
+        return meshes
+
+    @staticmethod
+    def link_meshes(
+            collection=None,
+            meshes=None,
+            location=(0.0, 0.0, 0.0)):
+
+        if len(meshes) == 1:
+            mesh_obj = bpy.data.objects.new(meshes[0].name, meshes[0])
+            mesh_obj.location = location
+            collection.objects.link(mesh_obj)
+            return mesh_obj
+        else:
+            # Chunks share the grid's coordinate space, so they are placed
+            # at the parent's origin.
+            parent_obj = bpy.data.objects.new("Hex.Grid", None)
+            parent_obj.location = location
+            collection.objects.link(parent_obj)
+
+            for mesh_data in meshes:
+                mesh_obj = bpy.data.objects.new(mesh_data.name, mesh_data)
+                mesh_obj.parent = parent_obj
+                collection.objects.link(mesh_obj)
+            return parent_obj
 
     @classmethod
     def poll(cls, context):
@@ -284,14 +735,753 @@ class HexGridMeshMaker(bpy.types.Operator):
             return 0
 
     @staticmethod
-    def grid_hex(
-            bm=None,
+    def axial_coords(rings=1, cell_order="AXIAL") -> list:
+        verif_rings = 1 if rings < 1 else rings
+        i_max = verif_rings - 1
+        i_min = -i_max
+
+        if cell_order == "SPIRAL":
+            # Walk each ring in turn, so that a ring's cells are contiguous.
+            # See https://www.redblobgames.com/grids/hexagons/#rings-spiral
+            coords = [(0, 0)]
+            for ring in range(1, verif_rings):
+                i = -ring
+                j = ring
+                for direction in HexGridMeshMaker.ring_directions:
+                    for _ in range(0, ring):
+                        coords.append((i, j))
+                        i = i + direction[0]
+                        j = j + direction[1]
+            return coords
+
+        # See https://www.redblobgames.com/grids/hexagons/implementation.html#shape-hexagon
+        coords = []
+        for i in range(i_min, i_max + 1):
+            j_min = max(i_min, i_min - i)
+            j_max = min(i_max, i_max - i)
+            for j in range(j_min, j_max + 1):
+                coords.append((i, j))
+
+        return HexGridMeshMaker.order_coords(coords, cell_order)
+
+    @staticmethod
+    def board_coords(
+            board_shape="HEXAGON",
+            rings=1,
+            board_width=8,
+            board_height=8,
+            mask=None,
+            cell_order="AXIAL") -> list:
+
+        if board_shape not in ["RECTANGLE", "PARALLELOGRAM", "TRIANGLE", "MASK"]:
+            return HexGridMeshMaker.axial_coords(rings, cell_order)
+
+        verif_width = max(1, board_width)
+        verif_height = max(1, board_height)
+        i_min = -(verif_width // 2)
+        j_min = -(verif_height // 2)
+
+        # See https://www.redblobgames.com/grids/hexagons/implementation.html#map-shapes
+        coords = []
+        if board_shape == "PARALLELOGRAM":
+            for i in range(i_min, i_min + verif_width):
+                for j in range(j_min, j_min + verif_height):
+                    coords.append((i, j))
+        elif board_shape == "TRIANGLE":
+            # Shifted so that the center cell is near the origin.
+            shift = (verif_width - 1) // 3
+            for i in range(0, verif_width):
+                for j in range(0, verif_width - i):
+                    coords.append((i - shift, j - shift))
+        else:
+            # Rows are offset so that the board is a rectangle. Mask rows
+            # begin at the bottom, as image pixels do.
+            for row in range(0, verif_height):
+                j = j_min + row
+                mask_row = None
+                if mask is not None:
+                    if row >= len(mask):
+                        continue
+                    mask_row = mask[row]
+
+                i_start = i_min - (j // 2)
+                for col in range(0, verif_width):
+                    if mask_row is not None \
+                            and (col >= len(mask_row) or not mask_row[col]):
+                        continue
+                    coords.append((i_start + col, j))
+
+        return HexGridMeshMaker.order_coords(coords, cell_order)
+
+    @staticmethod
+    def check_mask_image(board_shape="HEXAGON", mask_image="") -> str:
+        # Returns a message if a mask board has no usable image.
+        if board_shape != "MASK":
+            return ""
+        image = bpy.data.images.get(mask_image)
+        if image is None:
+            return "Mask image \"%s\" not found" % mask_image
+        if image.size[0] < 1 or image.size[1] < 1:
+            return "Mask image \"%s\" has no pixels" % mask_image
+        return ""
+
+    @staticmethod
+    def image_mask(
+            image_name="",
+            threshold=0.5,
+            board_width=8,
+            board_height=8) -> list:
+
+        image = bpy.data.images.get(image_name)
+        if image is None or image.size[0] < 1 or image.size[1] < 1:
+            return None
+
+        # Pixels are read in bulk, then the nearest pixel to each cell is
+        # tested against the threshold.
+        img_width = image.size[0]
+        img_height = image.size[1]
+        channels = image.channels
+        pixels = array("f", [0.0]) * (img_width * img_height * channels)
+        image.pixels.foreach_get(pixels)
+
+        verif_width = max(1, board_width)
+        verif_height = max(1, board_height)
+        mask = []
+        for row in range(0, verif_height):
+            py = min(img_height - 1, int((row + 0.5) * img_height / verif_height))
+            mask_row = []
+            for col in range(0, verif_width):
+                px = min(img_width - 1, int((col + 0.5) * img_width / verif_width))
+                idx = (py * img_width + px) * channels
+                if channels >= 3:
+                    value = (pixels[idx] + pixels[idx + 1] + pixels[idx + 2]) / 3.0
+                else:
+                    value = pixels[idx]
+                if channels == 4 or channels == 2:
+                    value = value * pixels[idx + channels - 1]
+                mask_row.append(value >= threshold)
+            mask.append(mask_row)
+
+        return mask
+
+    @staticmethod
+    def order_coords(coords=None, cell_order="AXIAL") -> list:
+        if not coords or cell_order not in ["SPIRAL", "HILBERT", "MORTON"]:
+            return coords
+
+        if cell_order == "SPIRAL":
+            # Sorted by ring, then by angle counter clockwise from the
+            # upper left, as in the walk used by hexagon boards.
+            sqrt_3 = 3.0 ** 0.5
+            tau = math.tau
+            start = tau / 3.0 - 0.000001
+            coords.sort(key=lambda co: (
+                max(abs(co[0]), abs(co[1]), abs(co[0] + co[1])),
+                (math.atan2(1.5 * co[1], sqrt_3 * (co[0] + co[1] * 0.5)) - start) % tau))
+            return coords
+
+        # Coordinates are shifted to be non-negative, then sorted by
+        # their distance along a space filling curve.
+        i_min = min(co[0] for co in coords)
+        j_min = min(co[1] for co in coords)
+        span = max(
+            max(co[0] for co in coords) - i_min,
+            max(co[1] for co in coords) - j_min) + 1
+        side = 1
+        while side < span:
+            side = side * 2
+
+        if cell_order == "HILBERT":
+            coords.sort(key=lambda co: HexGridMeshMaker.hilbert_index(
+                side, co[0] - i_min, co[1] - j_min))
+        else:
+            coords.sort(key=lambda co: HexGridMeshMaker.morton_index(
+                co[0] - i_min, co[1] - j_min))
+
+        return coords
+
+    @staticmethod
+    def ring_cells(ring=0) -> range:
+        # Range of cell ids in a ring when cells are in spiral order.
+        if ring < 1:
+            return range(0, 1)
+        return range(3 * ring * (ring - 1) + 1, 3 * ring * (ring + 1) + 1)
+
+    @staticmethod
+    def hilbert_index(side=1, x=0, y=0) -> int:
+        # See https://en.wikipedia.org/wiki/Hilbert_curve#Applications_and_mapping_algorithms
+        d = 0
+        s = side // 2
+        while s > 0:
+            rx = 1 if (x & s) > 0 else 0
+            ry = 1 if (y & s) > 0 else 0
+            d = d + s * s * ((3 * rx) ^ ry)
+
+            # Rotate quadrant.
+            if ry == 0:
+                if rx == 1:
+                    x = side - 1 - x
+                    y = side - 1 - y
+                x, y = y, x
+            s = s // 2
+        return d
+
+    @staticmethod
+    def morton_index(x=0, y=0) -> int:
+        d = 0
+        bit = 0
+        while (x >> bit) > 0 or (y >> bit) > 0:
+            d = d | (((x >> bit) & 1) << (2 * bit)) | (((y >> bit) & 1) << (2 * bit + 1))
+            bit = bit + 1
+        return d
+
+    @staticmethod
+    def chunk_cells(
+            coords=None,
+            chunk_type="NONE",
+            chunk_count=1) -> list:
+
+        # A cell's id is its index in the full coordinate list, so that ids
+        # are consistent no matter how the grid is split.
+        cells = [(cell_id, co[0], co[1]) for cell_id, co in enumerate(coords)]
+        verif_count = max(1, chunk_count)
+        if chunk_type not in ["REGION", "SECTOR"] or verif_count < 2 or not cells:
+            return [cells]
+
+        i_lo = min(cell[1] for cell in cells)
+        j_lo = min(cell[2] for cell in cells)
+        i_span = max(cell[1] for cell in cells) - i_lo + 1
+        j_span = max(cell[2] for cell in cells) - j_lo + 1
+        sqrt_3 = 3.0 ** 0.5
+        tau = math.tau
+
+        chunks = {}
+        for cell in cells:
+            i = cell[1]
+            j = cell[2]
+
+            if chunk_type == "SECTOR":
+                # Angle of the cell center, independent of cell radius.
+                ang = math.atan2(1.5 * j, sqrt_3 * (i + j * 0.5)) % tau
+                key = min(int(ang * verif_count / tau), verif_count - 1)
+            else:
+                ci = (i - i_lo) * verif_count // i_span
+                cj = (j - j_lo) * verif_count // j_span
+                key = ci * verif_count + cj
+
+            if key in chunks:
+                chunks[key].append(cell)
+            else:
+                chunks[key] = [cell]
+
+        return [chunks[key] for key in sorted(chunks)]
+
+    @staticmethod
+    def cell_centers(coords=None, cell_radius=0.5, orientation=0.0) -> list:
+        # Rotated cell centers, as found by grid_hex_steps.
+        verif_rad = max(0.000001, cell_radius)
+        extent = 3.0 ** 0.5 * verif_rad
+        half_ext = extent * 0.5
+        rad_1_5 = verif_rad * 1.5
+        cos_a = math.cos(orientation)
+        sin_a = math.sin(orientation)
+
+        points = []
+        for co in coords:
+            x = co[0] * extent + co[1] * half_ext
+            y = co[1] * rad_1_5
+            points.append((cos_a * x - sin_a * y, sin_a * x + cos_a * y, 0.0))
+        return points
+
+    @staticmethod
+    def grid_bounds(coords=None, cell_radius=0.5) -> tuple:
+        # Left, bottom, width and height of the cells' bounding box.
+        verif_rad = max(0.000001, cell_radius)
+        sqrt_3 = 3.0 ** 0.5
+        extent = sqrt_3 * verif_rad
+        if not coords:
+            return (-0.5 * extent, -verif_rad, extent, 2.0 * verif_rad)
+
+        xs = [co[0] + co[1] * 0.5 for co in coords]
+        ys = [co[1] for co in coords]
+        left = (min(xs) - 0.5) * extent
+        bottom = min(ys) * 1.5 * verif_rad - verif_rad
+        width = (max(xs) + 0.5) * extent - left
+        height = max(ys) * 1.5 * verif_rad + verif_rad - bottom
+        return (left, bottom, width, height)
+
+    @staticmethod
+    def flat_matrix(matrix=None) -> list:
+        # Accepts a 4 x 4 matrix as rows or as 16 numbers.
+        if matrix is None:
+            return None
+        flat = []
+        for row in matrix:
+            if hasattr(row, "__len__"):
+                flat.extend(float(value) for value in row)
+            else:
+                flat.append(float(row))
+        if len(flat) != 16:
+            raise ValueError("Transform must be a 4 x 4 matrix")
+        return flat
+
+    @staticmethod
+    def settings_dict(params=None) -> dict:
+        # Vector properties are converted to lists so they can be dumped or
+        # stored as custom properties.
+        entries = {}
+        for key, value in params.items():
+            if isinstance(value, str):
+                entries[key] = value
+            elif isinstance(value, bool):
+                entries[key] = int(value)
+            elif hasattr(value, "__len__"):
+                entries[key] = list(value)
+            else:
+                entries[key] = value
+        return entries
+
+    @staticmethod
+    def cache_key(params=None) -> str:
+        entries = HexGridMeshMaker.settings_dict(params)
+        entries["version"] = [bl_info["version"], HexGridMeshMaker.cache_version]
+        dump = json.dumps(entries, sort_keys=True)
+        return hashlib.sha1(dump.encode("utf-8")).hexdigest()
+
+    @staticmethod
+    def cache_load(key="") -> list:
+        entry_dir = os.path.join(HexGridMeshMaker.cache_dir, key)
+        if not os.path.isdir(entry_dir):
+            return None
+
+        # Each chunk is stored as a set of .npy files prefixed by its index.
+        # These are memory-mapped rather than read into memory.
+        chunks = []
+        try:
+            while os.path.isfile(os.path.join(entry_dir, "%d_co.npy" % len(chunks))):
+                prefix = os.path.join(entry_dir, "%d_" % len(chunks))
+                arrays = {}
+                for name in HexGridMeshMaker.mesh_array_names:
+                    path = prefix + name + ".npy"
+                    if os.path.isfile(path):
+                        arrays[name] = np.load(path, mmap_mode="r")
+                chunks.append(arrays)
+
+            # Mark as recently used.
+            os.utime(entry_dir)
+        except (OSError, ValueError):
+            return None
+
+        return chunks if chunks else None
+
+    @staticmethod
+    def cache_save(key="", chunks=None) -> bool:
+        cache_dir = HexGridMeshMaker.cache_dir
+        entry_dir = os.path.join(cache_dir, key)
+
+        # Keys are found from the settings, so an existing entry already
+        # holds the same geometry, perhaps written by another process.
+        if os.path.isdir(entry_dir):
+            return True
+
+        temp_dir = None
+        try:
+            os.makedirs(cache_dir, exist_ok=True)
+
+            # Write to a temporary directory first, then rename, so that a
+            # partial entry is never loaded.
+            temp_dir = tempfile.mkdtemp(dir=cache_dir, prefix=".tmp_")
+            for chunk_idx, arrays in enumerate(chunks):
+                for name, values in arrays.items():
+                    np.save(os.path.join(
+                        temp_dir, "%d_%s.npy" % (chunk_idx, name)), values)
+
+            os.replace(temp_dir, entry_dir)
+            temp_dir = None
+        except OSError:
+            if not os.path.isdir(entry_dir):
+                return False
+        finally:
+            if temp_dir is not None:
+                shutil.rmtree(temp_dir, ignore_errors=True)
+
+        HexGridMeshMaker.cache_evict()
+        return True
+
+    @staticmethod
+    def cache_evict(max_bytes=None):
+        cache_dir = HexGridMeshMaker.cache_dir
+        if max_bytes is None:
+            max_bytes = HexGridMeshMaker.cache_max_bytes
+        if not os.path.isdir(cache_dir):
+            return
+
+        entries = []
+        total = 0
+        now = time.time()
+        for entry in os.scandir(cache_dir):
+            if not entry.is_dir():
+                continue
+            if entry.name.startswith(".tmp_"):
+                if now - entry.stat().st_mtime > HexGridMeshMaker.cache_temp_age:
+                    shutil.rmtree(entry.path, ignore_errors=True)
+                continue
+            if entry.name.startswith("."):
+                continue
+
+            # Entries may be removed by another process while scanned.
+            size = 0
+            try:
+                for file in os.scandir(entry.path):
+                    size += file.stat().st_size
+                entries.append((entry.stat().st_mtime, size, entry.path))
+            except OSError:
+                continue
+            total += size
+
+        # Remove least recently used entries first.
+        entries.sort()
+        for _, size, path in entries:
+            if total <= max_bytes:
+                break
+            shutil.rmtree(path, ignore_errors=True)
+            total -= size
+
+    @staticmethod
+    def arrays_from_mesh(mesh_data=None) -> dict:
+        vert_count = len(mesh_data.vertices)
+        edge_count = len(mesh_data.edges)
+        loop_count = len(mesh_data.loops)
+        face_count = len(mesh_data.polygons)
+
+        co = np.empty(vert_count * 3, dtype=np.float32)
+        edges = np.empty(edge_count * 2, dtype=np.int32)
+        loop_start = np.empty(face_count, dtype=np.int32)
+        loop_vert = np.empty(loop_count, dtype=np.int32)
+
+        mesh_data.vertices.foreach_get("co", co)
+        mesh_data.edges.foreach_get("vertices", edges)
+        mesh_data.polygons.foreach_get("loop_start", loop_start)
+        mesh_data.loops.foreach_get("vertex_index", loop_vert)
+
+        arrays = {
+            "co": co,
+            "edges": edges,
+            "loop_start": loop_start,
+            "loop_vert": loop_vert}
+
+        uv_layer = mesh_data.uv_layers.active
+        if uv_layer is not None:
+            uv = np.empty(loop_count * 2, dtype=np.float32)
+            uv_layer.data.foreach_get("uv", uv)
+            arrays["uv"] = uv
+
+        for name, _ in HexGridMeshMaker.int_attributes:
+            attr = mesh_data.attributes.get(name)
+            if attr is not None:
+                values = np.empty(len(attr.data), dtype=np.int32)
+                attr.data.foreach_get("value", values)
+                arrays[name] = values
+
+        for name, prop in HexGridMeshMaker.cell_properties:
+            values = mesh_data.get(prop)
+            if values is not None:
+                arrays[name] = np.array(values, dtype=np.int32)
+
+        return arrays
+
+    @staticmethod
+    def mesh_from_arrays(name="Hex.Grid", arrays=None):
+        mesh_data = bpy.data.meshes.new(name)
+
+        co = arrays["co"]
+        edges = arrays["edges"]
+        loop_start = arrays["loop_start"]
+        loop_vert = arrays["loop_vert"]
+
+        mesh_data.vertices.add(len(co) // 3)
+        mesh_data.vertices.foreach_set("co", co)
+        mesh_data.edges.add(len(edges) // 2)
+        mesh_data.edges.foreach_set("vertices", edges)
+        mesh_data.loops.add(len(loop_vert))
+        mesh_data.loops.foreach_set("vertex_index", loop_vert)
+        mesh_data.polygons.add(len(loop_start))
+        mesh_data.polygons.foreach_set("loop_start", loop_start)
+
+        if "uv" in arrays:
+            uv_layer = mesh_data.uv_layers.new(name="UVMap")
+            uv_layer.data.foreach_set("uv", arrays["uv"])
+
+        # Edges of faces are found before attributes are written, so that
+        # the edge domain has its final size. Wire grids have no faces, and
+        # finding their edges again may reorder them away from their
+        # attributes.
+        mesh_data.update(calc_edges=len(loop_start) > 0)
+
+        for name, domain in HexGridMeshMaker.int_attributes:
+            if name in arrays:
+                attr = mesh_data.attributes.new(name, "INT", domain)
+                attr.data.foreach_set("value", arrays[name])
+
+        for name, prop in HexGridMeshMaker.cell_properties:
+            if name in arrays:
+                mesh_data[prop] = arrays[name].tolist()
+
+        return mesh_data
+
+    @staticmethod
+    def run_steps(steps):
+        while True:
+            try:
+                next(steps)
+            except StopIteration as stop:
+                return stop.value
+
+    @staticmethod
+    def grid_hex(**kwargs) -> dict:
+        return HexGridMeshMaker.run_steps(
+            HexGridMeshMaker.grid_hex_steps(**kwargs))
+
+    @staticmethod
+    def cell_template(face_type="NGON", outline_count=0) -> dict:
+        # Vertices of a cell are described by kind and corner index. "C" is
+        # a corner, "M" the midpoint between a corner and the next, "R" a
+        # point on a rounded outline and "O" the center. Corners start at
+        # the top center vertex, then move counter-clockwise to the top right
+        # shoulder vertex. The ring is the cell outline, used for extrusion.
+        corners = [("C", 0), ("C", 1), ("C", 2), ("C", 3), ("C", 4), ("C", 5)]
+
+        if outline_count > 0:
+            ring = tuple(range(0, outline_count))
+            verts = [("R", k) for k in ring]
+            if face_type == "TRI":
+                return {
+                    "verts": [("O", 0)] + verts,
+                    "faces": [
+                        (0, k + 1, (k + 1) % outline_count + 1)
+                        for k in ring],
+                    "ring": tuple(k + 1 for k in ring),
+                    "edges": []}
+            return {
+                "verts": verts,
+                "faces": [ring],
+                "ring": ring,
+                "edges": []}
+
+        if face_type == "TRI":
+            # Hexagon center is first for fan patterns.
+            return {
+                "verts": [("O", 0)] + corners,
+                "faces": [
+                    (0, 1, 2), (0, 2, 3), (0, 3, 4),
+                    (0, 4, 5), (0, 5, 6), (0, 6, 1)],
+                "ring": (1, 2, 3, 4, 5, 6),
+                "edges": []}
+        elif face_type == "QUAD2":
+            return {
+                "verts": corners,
+                "faces": [(0, 1, 2, 3), (3, 4, 5, 0)],
+                "ring": (0, 1, 2, 3, 4, 5),
+                "edges": []}
+        elif face_type == "QUAD3":
+            return {
+                "verts": [("O", 0)] + corners,
+                "faces": [(0, 1, 2, 3), (0, 3, 4, 5), (0, 5, 6, 1)],
+                "ring": (1, 2, 3, 4, 5, 6),
+                "edges": []}
+        elif face_type == "QUAD_CR":
+            return {
+                "verts": [
+                    ("O", 0), ("C", 0), ("C", 1), ("M", 1),
+                    ("C", 2), ("C", 3), ("C", 4), ("M", 4), ("C", 5)],
+                "faces": [
+                    (0, 1, 2, 3), (0, 3, 4, 5),
+                    (0, 5, 6, 7), (0, 7, 8, 1)],
+                "ring": (1, 2, 3, 4, 5, 6, 7, 8),
+                "edges": []}
+        elif face_type == "QUAD6":
+            return {
+                "verts": [
+                    ("O", 0),
+                    ("C", 0), ("M", 0), ("C", 1), ("M", 1),
+                    ("C", 2), ("M", 2), ("C", 3), ("M", 3),
+                    ("C", 4), ("M", 4), ("C", 5), ("M", 5)],
+                "faces": [
+                    (0, 12, 1, 2), (0, 2, 3, 4), (0, 4, 5, 6),
+                    (0, 6, 7, 8), (0, 8, 9, 10), (0, 10, 11, 12)],
+                "ring": (1, 2, 3, 4, 5, 6, 7, 8, 9, 10, 11, 12),
+                "edges": []}
+        elif face_type == "PENTA2":
+            return {
+                "verts": [
+                    ("C", 0), ("C", 1), ("M", 1), ("C", 2),
+                    ("C", 3), ("C", 4), ("M", 4), ("C", 5)],
+                "faces": [(0, 1, 2, 6, 7), (2, 3, 4, 5, 6)],
+                "ring": (0, 1, 2, 3, 4, 5, 6, 7),
+                "edges": []}
+        elif face_type == "PENTA3":
+            # TODO Rearrange so there is a face at the top ?
+            return {
+                "verts": [
+                    ("O", 0), ("C", 0), ("M", 0), ("C", 1), ("C", 2),
+                    ("M", 2), ("C", 3), ("C", 4), ("M", 4), ("C", 5)],
+                "faces": [
+                    (0, 2, 3, 4, 5), (0, 5, 6, 7, 8), (0, 8, 9, 1, 2)],
+                "ring": (1, 2, 3, 4, 5, 6, 7, 8, 9),
+                "edges": []}
+        elif face_type == "CATALAN_RAY":
+            return {
+                "verts": corners,
+                "faces": [(0, 1, 2), (0, 2, 3), (0, 3, 4), (0, 4, 5)],
+                "ring": (0, 1, 2, 3, 4, 5),
+                "edges": []}
+        elif face_type == "CATALAN_TRI":
+            # Central triangle, then peripheral triangles.
+            return {
+                "verts": corners,
+                "faces": [(1, 3, 5), (0, 1, 5), (1, 2, 3), (3, 4, 5)],
+                "ring": (0, 1, 2, 3, 4, 5),
+                "edges": []}
+        elif face_type == "CATALAN_Z":
+            return {
+                "verts": corners,
+                "faces": [(0, 1, 5), (1, 2, 5), (2, 4, 5), (2, 3, 4)],
+                "ring": (0, 1, 2, 3, 4, 5),
+                "edges": []}
+        elif face_type == "WIRE":
+            return {
+                "verts": corners,
+                "faces": [],
+                "ring": (0, 1, 2, 3, 4, 5),
+                "edges": [(0, 1), (1, 2), (2, 3), (3, 4), (4, 5), (5, 0)]}
+        elif face_type == "POINTS":
+            return {
+                "verts": [("O", 0)],
+                "faces": [],
+                "ring": (),
+                "edges": []}
+        else:
+            return {
+                "verts": corners,
+                "faces": [(0, 1, 2, 3, 4, 5)],
+                "ring": (0, 1, 2, 3, 4, 5),
+                "edges": []}
+
+    @staticmethod
+    def is_rounded(face_type="NGON", rounding=0.0) -> bool:
+        return rounding > 0.0 and face_type in ["NGON", "TRI"]
+
+    @staticmethod
+    def rounded_outline(
+            radius=0.5,
+            rounding=0.0,
+            corner_segments=4) -> list:
+
+        # Constants.
+        sqrt_3 = 3.0 ** 0.5
+        handle_fac = 2.0 / 3.0
+
+        verif_rounding = max(0.0, min(1.0, rounding))
+        verif_segments = max(1, corner_segments)
+        half_rad = radius * 0.5
+        rad_rt3_2 = half_rad * sqrt_3
+        v = [
+            (0.0, radius),
+            (-rad_rt3_2, half_rad),
+            (-rad_rt3_2, -half_rad),
+            (0.0, -radius),
+            (rad_rt3_2, -half_rad),
+            (rad_rt3_2, half_rad)]
+        mp = [(
+            (v[k][0] + v[(k + 1) % 6][0]) * 0.5,
+            (v[k][1] + v[(k + 1) % 6][1]) * 0.5) for k in range(0, 6)]
+
+        # Each corner is a cubic Bezier curve from a point on the previous
+        # edge to a point on the next, with handles two thirds of the way to
+        # the corner, as in the rounded curve grid. Fully rounded corners
+        # share their end points, so the last is skipped.
+        last_step = verif_segments if verif_rounding < 1.0 else verif_segments - 1
+        inv_segments = 1.0 / verif_segments
+        one_round = 1.0 - verif_rounding
+        points = []
+        for k in range(0, 6):
+            v_curr = v[k]
+            mp_prev = mp[k - 1]
+            mp_next = mp[k]
+
+            p0 = (
+                one_round * v_curr[0] + verif_rounding * mp_prev[0],
+                one_round * v_curr[1] + verif_rounding * mp_prev[1])
+            p3 = (
+                one_round * v_curr[0] + verif_rounding * mp_next[0],
+                one_round * v_curr[1] + verif_rounding * mp_next[1])
+            p1 = (
+                p0[0] + handle_fac * (v_curr[0] - p0[0]),
+                p0[1] + handle_fac * (v_curr[1] - p0[1]))
+            p2 = (
+                p3[0] + handle_fac * (v_curr[0] - p3[0]),
+                p3[1] + handle_fac * (v_curr[1] - p3[1]))
+
+            for step in range(0, last_step + 1):
+                t = step * inv_segments
+                u = 1.0 - t
+                b0 = u * u * u
+                b1 = 3.0 * u * u * t
+                b2 = 3.0 * u * t * t
+                b3 = t * t * t
+                points.append((
+                    b0 * p0[0] + b1 * p1[0] + b2 * p2[0] + b3 * p3[0],
+                    b0 * p0[1] + b1 * p1[1] + b2 * p2[1] + b3 * p3[1]))
+
+        return points
+
+    # Corners shared between neighboring cells are identified by a key: the
+    # corner type, top (0) or bottom (1), and the axial coordinates of the
+    # cell that owns it. Offsets are listed by corner index.
+    corner_keys = [
+        (0, 0, 0),
+        (1, -1, 1),
+        (0, 0, -1),
+        (1, 0, 0),
+        (0, 1, -1),
+        (1, 0, 1)]
+
+    # Axial offset to the neighbor across each edge, where edge k runs from
+    # corner k to corner k + 1.
+    edge_neighbors = [
+        (-1, 1),
+        (-1, 0),
+        (0, -1),
+        (1, -1),
+        (1, 0),
+        (0, 1)]
+
+    @staticmethod
+    def lattice_key(i=0, j=0, kind="C", k=0) -> tuple:
+        if kind == "C":
+            offset = HexGridMeshMaker.corner_keys[k]
+            return (offset[0], i + offset[1], j + offset[2])
+        elif kind == "M":
+            key_a = HexGridMeshMaker.lattice_key(i, j, "C", k)
+            key_b = HexGridMeshMaker.lattice_key(i, j, "C", (k + 1) % 6)
+            return (2,) + min(key_a, key_b) + max(key_a, key_b)
+        return (3, i, j)
+
+    @staticmethod
+    def grid_hex_steps(
             rings=1,
+            cells=None,
+            cell_lookup=None,
+            bounds=None,
             cell_radius=0.5,
             cell_margin=0.0,
             face_type="NGON",
+            rounding=0.0,
+            corner_segments=4,
             orientation=0.0,
-            merge_verts=False) -> dict:
+            transform=None,
+            merge_verts=False,
+            edge_attributes=False) -> dict:
 
         # Validate input arguments.
         verif_rings = 1 if rings < 1 else rings
@@ -299,8 +1489,11 @@ class HexGridMeshMaker(bpy.types.Operator):
         verif_margin = max(0.0, cell_margin)
 
         # Pentagonal faces subdivide edges that share a boundary with edges that
-        # remain undivided, leading to issues.
-        verif_merge = merge_verts and verif_margin == 0.0 and face_type != "PENTA3"
+        # remain undivided, leading to issues. Rounded cells do not share
+        # corners.
+        is_rounded = HexGridMeshMaker.is_rounded(face_type, rounding)
+        verif_merge = merge_verts and verif_margin == 0.0 and face_type != "PENTA3" \
+            and not is_rounded
 
         # Intermediate calculations.
         sqrt_3 = 3.0 ** 0.5  # 1.7320508075688772
@@ -313,264 +1506,216 @@ class HexGridMeshMaker(bpy.types.Operator):
         half_rad = pad_rad * 0.5
         rad_rt3_2 = half_rad * sqrt_3
 
-        i_max = verif_rings - 1
-        i_min = -i_max
-
-        verts = []
-        faces = []
-
-        # See https://www.redblobgames.com/grids/hexagons/implementation.html#shape-hexagon
-        for i in range(i_min, i_max + 1):
-            j_min = max(i_min, i_min - i)
-            j_max = min(i_max, i_max - i)
-            i_ext = i * extent
-
-            for j in range(j_min, j_max + 1):
-                # Hexagon center.
-                x = i_ext + j * half_ext
-                y = j * rad_1_5
-
-                # Hexagon edges.
-                left = x - rad_rt3_2
-                right = x + rad_rt3_2
-                top = y + half_rad
-                bottom = y - half_rad
-
-                # Vertices on hexagon edge starting at the top center vertex, then
-                # moving counter- clockwise to the top right shoulder vertex.
-                if face_type == "POINTS":
-                    hex_vs = [bm.verts.new((x, y, 0.0))]
-                else:
-                    hex_vs = [
-                        bm.verts.new((x, y + pad_rad, 0.0)),
-                        bm.verts.new((left, top, 0.0)),
-                        bm.verts.new((left, bottom, 0.0)),
-                        bm.verts.new((x, y - pad_rad, 0.0)),
-                        bm.verts.new((right, bottom, 0.0)),
-                        bm.verts.new((right, top, 0.0))]
-
-                hex_faces = []
-
-                if face_type == "TRI":
-                    # Insert hexagon center for fan patterns.
-                    hex_vs.insert(0, bm.verts.new((x, y, 0.0)))
-
-                    # Six triangles.
-                    hex_faces.append(bm.faces.new(
-                        [hex_vs[0], hex_vs[1], hex_vs[2]]))
-                    hex_faces.append(bm.faces.new(
-                        [hex_vs[0], hex_vs[2], hex_vs[3]]))
-                    hex_faces.append(bm.faces.new(
-                        [hex_vs[0], hex_vs[3], hex_vs[4]]))
-                    hex_faces.append(bm.faces.new(
-                        [hex_vs[0], hex_vs[4], hex_vs[5]]))
-                    hex_faces.append(bm.faces.new(
-                        [hex_vs[0], hex_vs[5], hex_vs[6]]))
-                    hex_faces.append(bm.faces.new(
-                        [hex_vs[0], hex_vs[6], hex_vs[1]]))
-
-                elif face_type == "QUAD2":
-
-                    # Two quadrilaterals.
-                    hex_faces.append(bm.faces.new(
-                        [hex_vs[0], hex_vs[1], hex_vs[2], hex_vs[3]]))
-                    hex_faces.append(bm.faces.new(
-                        [hex_vs[3], hex_vs[4], hex_vs[5], hex_vs[0]]))
-
-                elif face_type == "QUAD3":
-                    hex_vs.insert(0, bm.verts.new((x, y, 0.0)))
-
-                    # Three quadrilaterals.
-                    hex_faces.append(bm.faces.new(
-                        [hex_vs[0], hex_vs[1], hex_vs[2], hex_vs[3]]))
-                    hex_faces.append(bm.faces.new(
-                        [hex_vs[0], hex_vs[3], hex_vs[4], hex_vs[5]]))
-                    hex_faces.append(bm.faces.new(
-                        [hex_vs[0], hex_vs[5], hex_vs[6], hex_vs[1]]))
-
-                elif face_type == "QUAD_CR":
-                    # Calculate midpoints.
-                    mp0 = 0.5 * (hex_vs[1].co + hex_vs[2].co)
-                    mp1 = 0.5 * (hex_vs[4].co + hex_vs[5].co)
-
-                    # Insert center and midpoints.
-                    hex_vs.insert(0, bm.verts.new((x, y, 0.0)))
-                    hex_vs.insert(3, bm.verts.new((mp0[0], mp0[1], 0.0)))
-                    hex_vs.insert(7, bm.verts.new((mp1[0], mp1[1], 0.0)))
-
-                    # Four quadrilaterals.
-                    hex_faces.append(bm.faces.new(
-                        [hex_vs[0], hex_vs[1], hex_vs[2], hex_vs[3]]))
-                    hex_faces.append(bm.faces.new(
-                        [hex_vs[0], hex_vs[3], hex_vs[4], hex_vs[5]]))
-                    hex_faces.append(bm.faces.new(
-                        [hex_vs[0], hex_vs[5], hex_vs[6], hex_vs[7]]))
-                    hex_faces.append(bm.faces.new(
-                        [hex_vs[0], hex_vs[7], hex_vs[8], hex_vs[1]]))
-
-                elif face_type == "QUAD6":
-                    # Calculate midpoints.
-                    mp0 = 0.5 * (hex_vs[0].co + hex_vs[1].co)
-                    mp1 = 0.5 * (hex_vs[1].co + hex_vs[2].co)
-                    mp2 = 0.5 * (hex_vs[2].co + hex_vs[3].co)
-                    mp3 = 0.5 * (hex_vs[3].co + hex_vs[4].co)
-                    mp4 = 0.5 * (hex_vs[4].co + hex_vs[5].co)
-                    mp5 = 0.5 * (hex_vs[5].co + hex_vs[0].co)
-
-                    # Insert center and midpoints.
-                    hex_vs.insert(0, bm.verts.new((x, y, 0.0)))
-                    hex_vs.insert(2, bm.verts.new((mp0[0], mp0[1], 0.0)))
-                    hex_vs.insert(4, bm.verts.new((mp1[0], mp1[1], 0.0)))
-                    hex_vs.insert(6, bm.verts.new((mp2[0], mp2[1], 0.0)))
-                    hex_vs.insert(8, bm.verts.new((mp3[0], mp3[1], 0.0)))
-                    hex_vs.insert(10, bm.verts.new((mp4[0], mp4[1], 0.0)))
-                    hex_vs.insert(12, bm.verts.new((mp5[0], mp5[1], 0.0)))
-
-                    # Six quadrilaterals.
-                    hex_faces.append(bm.faces.new(
-                        [hex_vs[0], hex_vs[12], hex_vs[1], hex_vs[2]]))
-                    hex_faces.append(bm.faces.new(
-                        [hex_vs[0], hex_vs[2], hex_vs[3], hex_vs[4]]))
-                    hex_faces.append(bm.faces.new(
-                        [hex_vs[0], hex_vs[4], hex_vs[5], hex_vs[6]]))
-                    hex_faces.append(bm.faces.new(
-                        [hex_vs[0], hex_vs[6], hex_vs[7], hex_vs[8]]))
-                    hex_faces.append(bm.faces.new(
-                        [hex_vs[0], hex_vs[8], hex_vs[9], hex_vs[10]]))
-                    hex_faces.append(bm.faces.new(
-                        [hex_vs[0], hex_vs[10], hex_vs[11], hex_vs[12]]))
-
-                elif face_type == "PENTA2":
-                    # Calculate midpoints.
-                    mp0 = 0.5 * (hex_vs[1].co + hex_vs[2].co)
-                    mp1 = 0.5 * (hex_vs[4].co + hex_vs[5].co)
-
-                    # Insert midpoints.
-                    hex_vs.insert(2, bm.verts.new((mp0[0], mp0[1], 0.0)))
-                    hex_vs.insert(6, bm.verts.new((mp1[0], mp1[1], 0.0)))
-
-                    # Two pentagons.
-                    hex_faces.append(bm.faces.new(
-                        [hex_vs[0], hex_vs[1], hex_vs[2], hex_vs[6], hex_vs[7]]))
-                    hex_faces.append(bm.faces.new(
-                        [hex_vs[2], hex_vs[3], hex_vs[4], hex_vs[5], hex_vs[6]]))
-
-                elif face_type == "PENTA3":
-                    # Calculate midpoints.
-                    mp0 = 0.5 * (hex_vs[0].co + hex_vs[1].co)
-                    mp1 = 0.5 * (hex_vs[2].co + hex_vs[3].co)
-                    mp2 = 0.5 * (hex_vs[4].co + hex_vs[5].co)
-
-                    # Insert center and midpoints.
-                    hex_vs.insert(0, bm.verts.new((x, y, 0.0)))
-                    hex_vs.insert(2, bm.verts.new((mp0[0], mp0[1], 0.0)))
-                    hex_vs.insert(5, bm.verts.new((mp1[0], mp1[1], 0.0)))
-                    hex_vs.insert(8, bm.verts.new((mp2[0], mp2[1], 0.0)))
-
-                    # TODO Rearrange so there is a face at the top ?
-
-                    # Three pentagons.
-                    hex_faces.append(bm.faces.new(
-                        [hex_vs[0], hex_vs[2], hex_vs[3], hex_vs[4], hex_vs[5]]))
-                    hex_faces.append(bm.faces.new(
-                        [hex_vs[0], hex_vs[5], hex_vs[6], hex_vs[7], hex_vs[8]]))
-                    hex_faces.append(bm.faces.new(
-                        [hex_vs[0], hex_vs[8], hex_vs[9], hex_vs[1], hex_vs[2]]))
-
-                elif face_type == "CATALAN_RAY":
-                    hex_faces.append(bm.faces.new(
-                        [hex_vs[0], hex_vs[1], hex_vs[2]]))
-                    hex_faces.append(bm.faces.new(
-                        [hex_vs[0], hex_vs[2], hex_vs[3]]))
-                    hex_faces.append(bm.faces.new(
-                        [hex_vs[0], hex_vs[3], hex_vs[4]]))
-                    hex_faces.append(bm.faces.new(
-                        [hex_vs[0], hex_vs[4], hex_vs[5]]))
-
-                elif face_type == "CATALAN_TRI":
-                    # Central triangle.
-                    hex_faces.append(bm.faces.new(
-                        [hex_vs[1], hex_vs[3], hex_vs[5]]))
-
-                    # Peripheral triangles.
-                    hex_faces.append(bm.faces.new(
-                        [hex_vs[0], hex_vs[1], hex_vs[5]]))
-                    hex_faces.append(bm.faces.new(
-                        [hex_vs[1], hex_vs[2], hex_vs[3]]))
-                    hex_faces.append(bm.faces.new(
-                        [hex_vs[3], hex_vs[4], hex_vs[5]]))
-
-                elif face_type == "CATALAN_Z":
-                    hex_faces.append(bm.faces.new(
-                        [hex_vs[0], hex_vs[1], hex_vs[5]]))
-                    hex_faces.append(bm.faces.new(
-                        [hex_vs[1], hex_vs[2], hex_vs[5]]))
-                    hex_faces.append(bm.faces.new(
-                        [hex_vs[2], hex_vs[4], hex_vs[5]]))
-                    hex_faces.append(bm.faces.new(
-                        [hex_vs[2], hex_vs[3], hex_vs[4]]))
-
-                elif face_type == "WIRE":
-                    bm.edges.new([hex_vs[0], hex_vs[1]])
-                    bm.edges.new([hex_vs[1], hex_vs[2]])
-                    bm.edges.new([hex_vs[2], hex_vs[3]])
-                    bm.edges.new([hex_vs[3], hex_vs[4]])
-                    bm.edges.new([hex_vs[4], hex_vs[5]])
-                    bm.edges.new([hex_vs[5], hex_vs[0]])
-
-                elif face_type == "NGON":
-                    hex_faces.append(bm.faces.new(hex_vs))
-
-                verts.append(hex_vs)
-                faces.append(hex_faces)
-
-        # Remove duplicate vertices on hexagon edges.
-        if verif_merge:
-            bmesh.ops.remove_doubles(bm, verts=bm.verts, dist=0.000001)
-
-        # Ensure vertices have indices.
-        # bm.verts.sort(key=HexGridMaker.vertex_comparator)
-        # bm.verts.index_update()
-
-        # Find dimensions of grid.
-        ver_rng_2 = verif_rings * 2
-        width = extent * (ver_rng_2 - 1)
-        height = verif_rad * ver_rng_2 + verif_rad * i_max
-        half_width = width * 0.5
-        half_height = height * 0.5
+        if cells is None:
+            cells = HexGridMeshMaker.chunk_cells(
+                coords=HexGridMeshMaker.axial_coords(verif_rings))[0]
+
+        # Find dimensions of grid. Chunks are given the bounds of the whole
+        # grid, so that their UVs match.
+        if bounds is None:
+            bounds = HexGridMeshMaker.grid_bounds(
+                [(cell[1], cell[2]) for cell in cells], verif_rad)
+        left_bound = bounds[0]
+        bottom_bound = bounds[1]
+        width = bounds[2]
+        height = bounds[3]
         x_inv = 1.0 / width
         y_inv = 1.0 / height
 
-        # Calculate UV coordinates.
-        # This will stretch UVs to fill map, without
-        # preserving aspect ratio (width / height).
-        uv_layer = bm.loops.layers.uv.verify()
-        for face in bm.faces:
-            for loop in face.loops:
-                co = loop.vert.co
-                u = (co.x + half_width) * x_inv
-                v = (co.y + half_height) * y_inv
-                loop[uv_layer].uv = (u, v)
-
-        # Transform BMesh.
-        rot_mat = mathutils.Matrix.Rotation(
-            orientation, 4, (0.0, 0.0, 1.0))
-        bmesh.ops.rotate(bm, matrix=rot_mat, verts=bm.verts)
-
-        # Update normals, jic.
-        bm.normal_update()
+        # The grid is rotated, then transformed, as each vertex is placed.
+        # Terrain is found from cell centers that are only rotated.
+        cos_a = math.cos(orientation)
+        sin_a = math.sin(orientation)
+        m = HexGridMeshMaker.flat_matrix(transform) or [
+            1.0, 0.0, 0.0, 0.0,
+            0.0, 1.0, 0.0, 0.0,
+            0.0, 0.0, 1.0, 0.0,
+            0.0, 0.0, 0.0, 1.0]
+        m00 = m[0] * cos_a + m[1] * sin_a
+        m01 = m[1] * cos_a - m[0] * sin_a
+        m10 = m[4] * cos_a + m[5] * sin_a
+        m11 = m[5] * cos_a - m[4] * sin_a
+        m20 = m[8] * cos_a + m[9] * sin_a
+        m21 = m[9] * cos_a - m[8] * sin_a
+        m03 = m[3]
+        m13 = m[7]
+        m23 = m[11]
+
+        # Rounded outlines are found once, then offset to each center.
+        outline = []
+        if is_rounded:
+            outline = HexGridMeshMaker.rounded_outline(
+                radius=pad_rad,
+                rounding=rounding,
+                corner_segments=corner_segments)
+        template = HexGridMeshMaker.cell_template(face_type, len(outline))
+        tmpl_verts = template["verts"]
+        tmpl_faces = template["faces"]
+        tmpl_ring = template["ring"]
+        tmpl_edges = template["edges"]
+
+        # Geometry is held in flat arrays. Faces, rings and cells are stored
+        # as offsets into the array that follows them.
+        co = array("f")
+        vert_uvs = array("f")
+        vert_cells = array("i")
+        face_verts = array("i")
+        face_offsets = array("i", [0])
+        face_cells = array("i")
+        cell_face_offsets = array("i", [0])
+        ring_verts = array("i")
+        cell_ring_offsets = array("i", [0])
+        edges = array("i")
+        cell_ids = array("i")
+        axial = array("i")
+        centers = array("f")
+
+        edge_border = array("i")
+        edge_cell_a = array("i")
+        edge_cell_b = array("i")
+
+        # Merged vertices are found by lattice key rather than by distance.
+        lattice = {}
+
+        # Edges look up their neighbor to find borders and shared edges.
+        # Neighbors are found in the whole grid, so that seams between
+        # chunks are not mistaken for borders, but an edge is only left to
+        # a neighbor in the same chunk.
+        chunk_coords = set()
+        if tmpl_edges:
+            chunk_coords = set((cell[1], cell[2]) for cell in cells)
+            if cell_lookup is None:
+                cell_lookup = {}
+                for cell in cells:
+                    cell_lookup[(cell[1], cell[2])] = cell[0]
+
+        for cell in cells:
+            cell_id = cell[0]
+            i = cell[1]
+            j = cell[2]
+
+            # Hexagon center.
+            x = i * extent + j * half_ext
+            y = j * rad_1_5
+
+            # Hexagon edges.
+            left = x - rad_rt3_2
+            right = x + rad_rt3_2
+            top = y + half_rad
+            bottom = y - half_rad
+
+            corners = (
+                (x, y + pad_rad),
+                (left, top),
+                (left, bottom),
+                (x, y - pad_rad),
+                (right, bottom),
+                (right, top))
+
+            hex_vs = []
+            for kind, k in tmpl_verts:
+                key = None
+                if verif_merge and kind != "O":
+                    key = HexGridMeshMaker.lattice_key(i, j, kind, k)
+                    if key in lattice:
+                        hex_vs.append(lattice[key])
+                        continue
+
+                if kind == "C":
+                    px = corners[k][0]
+                    py = corners[k][1]
+                elif kind == "R":
+                    px = x + outline[k][0]
+                    py = y + outline[k][1]
+                elif kind == "M":
+                    corner_next = corners[(k + 1) % 6]
+                    px = 0.5 * (corners[k][0] + corner_next[0])
+                    py = 0.5 * (corners[k][1] + corner_next[1])
+                else:
+                    px = x
+                    py = y
+
+                # UVs stretch to fill the map, without preserving aspect
+                # ratio (width / height).
+                vert_idx = len(vert_cells)
+                co.extend((
+                    m00 * px + m01 * py + m03,
+                    m10 * px + m11 * py + m13,
+                    m20 * px + m21 * py + m23))
+                vert_uvs.extend((
+                    (px - left_bound) * x_inv,
+                    (py - bottom_bound) * y_inv))
+                vert_cells.append(cell_id)
+                if key is not None:
+                    lattice[key] = vert_idx
+                hex_vs.append(vert_idx)
+
+            for tmpl_face in tmpl_faces:
+                for k in tmpl_face:
+                    face_verts.append(hex_vs[k])
+                face_offsets.append(len(face_verts))
+                face_cells.append(cell_id)
+            cell_face_offsets.append(len(face_cells))
+
+            for k in tmpl_ring:
+                ring_verts.append(hex_vs[k])
+            cell_ring_offsets.append(len(ring_verts))
+
+            for edge_idx, tmpl_edge in enumerate(tmpl_edges):
+                offset = HexGridMeshMaker.edge_neighbors[edge_idx]
+                coord_nbr = (i + offset[0], j + offset[1])
+                cell_nbr = cell_lookup.get(coord_nbr, -1)
+
+                # An edge shared by two cells is written once, by the cell
+                # with the lesser axial coordinates.
+                if verif_merge and coord_nbr < (i, j) and coord_nbr in chunk_coords:
+                    continue
+
+                edges.extend((hex_vs[tmpl_edge[0]], hex_vs[tmpl_edge[1]]))
+                if edge_attributes:
+                    edge_border.append(1 if cell_nbr < 0 else 0)
+                    edge_cell_a.append(cell_id)
+                    edge_cell_b.append(cell_nbr)
+
+            cell_ids.append(cell_id)
+            axial.extend((i, j))
+            centers.extend((cos_a * x - sin_a * y, sin_a * x + cos_a * y))
+            yield
 
         return {
-            "faces": faces,
-            "hex_count": 1 + i_max * verif_rings * 3,
+            "co": co,
+            "vert_uvs": vert_uvs,
+            "vert_cells": vert_cells,
+            "vert_top": array("i", [0]) * len(vert_cells),
+            "face_verts": face_verts,
+            "face_offsets": face_offsets,
+            "face_cells": face_cells,
+            "cell_face_offsets": cell_face_offsets,
+            "ring_verts": ring_verts,
+            "cell_ring_offsets": cell_ring_offsets,
+            "edges": edges,
+            "edge_border": edge_border,
+            "edge_cell_a": edge_cell_a,
+            "edge_cell_b": edge_cell_b,
+            "cell_ids": cell_ids,
+            "axial": axial,
+            "centers": centers,
+            "heights": array("f", [0.0]) * len(cell_ids),
+            "up": (m[2], m[6], m[10]),
+            "transform": HexGridMeshMaker.flat_matrix(transform),
+            "hex_count": len(cells),
             "verif_merge": verif_merge,
             "width": width,
             "height": height}
 
     @staticmethod
-    def extrude_hexagons(
-            bm=None,
-            faces=None,
+    def extrude_hexagons(**kwargs) -> dict:
+        return HexGridMeshMaker.run_steps(
+            HexGridMeshMaker.extrude_hexagons_steps(**kwargs))
+
+    @staticmethod
+    def extrude_hexagons_steps(
+            grid=None,
             extrude_lb=0.000001,
             extrude_ub=1.0,
             terrain_type="UNIFORM",
@@ -580,111 +1725,994 @@ class HexGridMeshMaker(bpy.types.Operator):
             noise_basis="BLENDER",
             origin=(-1.0, -1.0),
             dest=(1.0, 1.0),
-            merge_verts=False):
+            seed_cells="",
+            distance_cost=0.0,
+            distance_max=0.0,
+            grid_heights=None,
+            merge_verts=False) -> dict:
 
         # Validate input arguments.
         verif_lb = min(extrude_lb, extrude_ub)
         verif_ub = max(extrude_lb, extrude_ub)
-        verif_infl = max(0.0, min(noise_influence, 1.0))
         if verif_lb < 0.000001 and verif_ub < 0.000001:
-            return False
+            return grid
+
+        co = grid["co"]
+        vert_uvs = grid["vert_uvs"]
+        vert_cells = grid["vert_cells"]
+        vert_top = grid["vert_top"]
+        face_verts = grid["face_verts"]
+        face_offsets = grid["face_offsets"]
+        cell_face_offsets = grid["cell_face_offsets"]
+        ring_verts = grid["ring_verts"]
+        cell_ring_offsets = grid["cell_ring_offsets"]
+        centers = grid["centers"]
+        axial = grid["axial"]
+        cell_ids = grid["cell_ids"]
+        cell_count = len(cell_ids)
+
+        # Top vertices are moved along the transformed z axis.
+        up = grid.get("up", (0.0, 0.0, 1.0))
+        up_x = up[0]
+        up_y = up[1]
+        up_z = up[2]
 
         # If vertices are merged, only uniform allowed.
         if merge_verts:
-            result = bmesh.ops.extrude_face_region(
-                bm,
-                geom=bm.faces,
-                use_keep_orig=True)
-
-            # Filter vertices out of results.
-            geom = result['geom']
-            new_verts = []
-            for elm in geom:
-                if isinstance(elm, bmesh.types.BMVert):
-                    new_verts.append(elm)
-
-            z = verif_ub
-            bmesh.ops.translate(bm, verts=new_verts,
-                                vec=(0.0, 0.0, z))
+            heights = [verif_ub] * cell_count
+        elif grid_heights is not None:
+            heights = [grid_heights[cell_id] for cell_id in cell_ids]
         else:
+            heights = HexGridMeshMaker.cell_heights(
+                points=[(centers[k * 2], centers[k * 2 + 1], 0.0)
+                        for k in range(cell_count)],
+                extrude_lb=verif_lb,
+                extrude_ub=verif_ub,
+                terrain_type=terrain_type,
+                noise_influence=noise_influence,
+                noise_scale=noise_scale,
+                noise_offset=noise_offset,
+                noise_basis=noise_basis,
+                origin=origin,
+                dest=dest,
+                axial=[(axial[k * 2], axial[k * 2 + 1]) for k in range(cell_count)],
+                seed_cells=seed_cells,
+                distance_cost=distance_cost,
+                distance_max=distance_max)
+
+        # Edges of a merged region that are shared by two cells appear once
+        # in each direction. Only outer edges get side faces.
+        ring_edges = {}
+        if merge_verts:
+            for cell_idx in range(cell_count):
+                r0 = cell_ring_offsets[cell_idx]
+                r1 = cell_ring_offsets[cell_idx + 1]
+                for r in range(r0, r1):
+                    r_next = r0 if r + 1 == r1 else r + 1
+                    ring_edges[(ring_verts[r], ring_verts[r_next])] = True
+
+        # Each cell's faces are kept together: bottom, top, then sides.
+        top_verts = array("i", [-1]) * len(vert_cells)
+        out_face_verts = array("i")
+        out_face_offsets = array("i", [0])
+        out_face_cells = array("i")
+        out_cell_face_offsets = array("i", [0])
+
+        for cell_idx in range(cell_count):
+            cell_id = cell_ids[cell_idx]
+            z = heights[cell_idx]
+            f0 = cell_face_offsets[cell_idx]
+            f1 = cell_face_offsets[cell_idx + 1]
+
+            # Original faces are kept, but flipped to face down. The first
+            # vertex stays first, so fans still begin at the center.
+            for f in range(f0, f1):
+                loop_start = face_offsets[f]
+                out_face_verts.append(face_verts[loop_start])
+                for loop in range(face_offsets[f + 1] - 1, loop_start, -1):
+                    out_face_verts.append(face_verts[loop])
+                out_face_offsets.append(len(out_face_verts))
+                out_face_cells.append(cell_id)
+
+            # Copy vertices to the top, then add top faces.
+            for f in range(f0, f1):
+                for loop in range(face_offsets[f], face_offsets[f + 1]):
+                    vert_idx = face_verts[loop]
+                    top_idx = top_verts[vert_idx]
+                    if top_idx < 0:
+                        top_idx = len(vert_cells)
+                        top_verts[vert_idx] = top_idx
+                        co.extend((
+                            co[vert_idx * 3] + z * up_x,
+                            co[vert_idx * 3 + 1] + z * up_y,
+                            co[vert_idx * 3 + 2] + z * up_z))
+                        vert_uvs.extend((vert_uvs[vert_idx * 2], vert_uvs[vert_idx * 2 + 1]))
+                        vert_cells.append(vert_cells[vert_idx])
+                        vert_top.append(1)
+                    out_face_verts.append(top_idx)
+                out_face_offsets.append(len(out_face_verts))
+                out_face_cells.append(cell_id)
+
+            # Side faces wind so that their normals face outward.
+            r0 = cell_ring_offsets[cell_idx]
+            r1 = cell_ring_offsets[cell_idx + 1]
+            for r in range(r0, r1):
+                r_next = r0 if r + 1 == r1 else r + 1
+                a = ring_verts[r]
+                b = ring_verts[r_next]
+                if merge_verts and (b, a) in ring_edges:
+                    continue
+                out_face_verts.extend((a, b, top_verts[b], top_verts[a]))
+                out_face_offsets.append(len(out_face_verts))
+                out_face_cells.append(cell_id)
+
+            out_cell_face_offsets.append(len(out_face_cells))
+            yield
+
+        grid["face_verts"] = out_face_verts
+        grid["face_offsets"] = out_face_offsets
+        grid["face_cells"] = out_face_cells
+        grid["cell_face_offsets"] = out_cell_face_offsets
+        grid["heights"] = array("f", heights)
+        return grid
 
-            # For linear gradient.
-            b = (dest[0] - origin[0],
-                dest[1] - origin[1])
-            dot_bb = b[0] ** 2 + b[1] ** 2
-            inv_dot_bb = 0.0 if dot_bb == 0.0 else 1.0 / dot_bb
+    @staticmethod
+    def arrays_from_grid(grid=None) -> dict:
+        # Loops share the UV of their vertex.
+        face_offsets = grid["face_offsets"]
+        face_verts = grid["face_verts"]
+        vert_uvs = grid["vert_uvs"]
+        uv = array("f")
+        for vert_idx in face_verts:
+            uv.extend(vert_uvs[vert_idx * 2:vert_idx * 2 + 2])
+
+        arrays = {
+            "co": grid["co"],
+            "edges": grid["edges"],
+            "loop_start": face_offsets[:-1],
+            "loop_vert": face_verts,
+            "uv": uv,
+            "cell_id": grid["face_cells"],
+            "vert_cell_id": grid["vert_cells"],
+            "vert_top": grid["vert_top"],
+            "cells": grid["cell_ids"],
+            "cell_axial": grid["axial"]}
+
+        # Edge attributes are only present when requested.
+        if grid["edge_cell_a"]:
+            arrays["edge_border"] = grid["edge_border"]
+            arrays["edge_cell_a"] = grid["edge_cell_a"]
+            arrays["edge_cell_b"] = grid["edge_cell_b"]
+
+        return arrays
 
-            # For conic gradient.
-            offset_ang = math.atan2(b[1], b[0])
+    @staticmethod
+    def cell_columns(grid=None) -> dict:
+        # Columns are typed arrays, so they can be shared through the
+        # buffer protocol without a copy.
+        centers = grid["centers"]
+        heights = grid["heights"]
+        cell_face_offsets = grid["cell_face_offsets"]
+        cell_count = len(grid["cell_ids"])
+
+        center = array("f", [0.0]) * (cell_count * 3)
+        center[0::3] = centers[0::2]
+        center[1::3] = centers[1::2]
+        center[2::3] = heights
+
+        # Centers are placed as the grid's vertices were.
+        m = grid.get("transform")
+        if m is not None:
+            for k in range(0, len(center), 3):
+                x = center[k]
+                y = center[k + 1]
+                z = center[k + 2]
+                center[k] = m[0] * x + m[1] * y + m[2] * z + m[3]
+                center[k + 1] = m[4] * x + m[5] * y + m[6] * z + m[7]
+                center[k + 2] = m[8] * x + m[9] * y + m[10] * z + m[11]
+
+        face_start = cell_face_offsets[:-1]
+        face_count = array("i", [0]) * cell_count
+        for cell_idx in range(cell_count):
+            face_count[cell_idx] = cell_face_offsets[cell_idx + 1] - face_start[cell_idx]
 
-            for hex_faces in faces:
+        return {
+            "cell_id": grid["cell_ids"],
+            "axial": grid["axial"],
+            "center": center,
+            "height": heights,
+            "face_start": face_start,
+            "face_count": face_count}
 
-                # Extrude does not translate.
-                result = bmesh.ops.extrude_face_region(
-                    bm,
-                    geom=hex_faces,
-                    use_keep_orig=True)
+    @staticmethod
+    def mesh_cell_columns(mesh_data=None) -> dict:
+        stored_cells = mesh_data.get("hex_grid_cells")
+        stored_axial = mesh_data.get("hex_grid_axial")
+        table = HexGridHeightUpdater.cell_table(mesh_data)
+        if stored_cells is None or stored_axial is None or table is None:
+            return None
+
+        settings = mesh_data.get("hex_grid") or {}
+        cell_ids = np.array(stored_cells, dtype=np.int32)
+        cell_count = len(cell_ids)
+        axial = np.array(stored_axial, dtype=np.int32).reshape(cell_count, 2)
+
+        # Row of each cell id.
+        lut = np.zeros(int(cell_ids.max()) + 1 if cell_count else 0, dtype=np.int32)
+        lut[cell_ids] = np.arange(cell_count, dtype=np.int32)
+
+        # Heights are the mean height of each cell's moving vertices. Cells
+        # that own no vertices are merged, and merged grids have one height.
+        used = table["cell_ids"]
+        zs = table["local"][2::3][table["movable"]]
+        counts = np.bincount(table["vert_cells"], minlength=len(used))
+        used_heights = np.bincount(
+            table["vert_cells"], weights=zs, minlength=len(used)) / np.maximum(counts, 1)
+        height = np.full(cell_count, used_heights.mean(), dtype=np.float32)
+        height[lut[used]] = used_heights
+
+        center = np.empty((cell_count, 3), dtype=np.float32)
+        center[:, :2] = np.array(HexGridMeshMaker.cell_centers(
+            coords=axial.tolist(),
+            cell_radius=settings.get("cell_radius", 0.5),
+            orientation=settings.get("orientation", 0.0)),
+            dtype=np.float32).reshape(cell_count, 3)[:, :2]
+        center[:, 2] = height
+        affine = table["affine"]
+        if affine is not None:
+            center = (center @ affine[:3, :3].T + affine[:3, 3]).astype(np.float32)
+
+        # Each cell's faces are contiguous, so a cell's range begins at the
+        # first face with its id.
+        face_start = np.zeros(cell_count, dtype=np.int32)
+        face_count = np.zeros(cell_count, dtype=np.int32)
+        face_attr = mesh_data.attributes.get("cell_id")
+        poly_count = len(mesh_data.polygons)
+        if face_attr is not None and poly_count > 0:
+            face_cells = np.empty(poly_count, dtype=np.int32)
+            face_attr.data.foreach_get("value", face_cells)
+            ids, starts, sizes = np.unique(
+                face_cells, return_index=True, return_counts=True)
+            face_start[lut[ids]] = starts
+            face_count[lut[ids]] = sizes
 
-                # Filter vertices out of results.
-                geom = result['geom']
-                new_verts = []
-                for elm in geom:
-                    if isinstance(elm, bmesh.types.BMVert):
-                        new_verts.append(elm)
+        return {
+            "cell_id": cell_ids,
+            "axial": axial,
+            "center": center,
+            "height": height,
+            "face_start": face_start,
+            "face_count": face_count}
 
-                # Find median point of hexagon.
-                point = mathutils.Vector((0.0, 0.0, 0.0))
-                for hex_face in hex_faces:
-                    point += hex_face.calc_center_median()
-                point /= len(hex_faces)
+    @staticmethod
+    def write_cell_columns(directory="", columns=None) -> list:
+        # Each column is written to its own .npy file, so it can be memory
+        # mapped on load without reading the others.
+        os.makedirs(directory, exist_ok=True)
+        widths = HexGridMeshMaker.cell_column_widths
+        paths = []
+        for name, column in columns.items():
+            data = np.asarray(column)
+            width = widths.get(name, 1)
+            if width > 1:
+                data = data.reshape(-1, width)
+            path = os.path.join(directory, name + ".npy")
+            np.save(path, data)
+            paths.append(path)
+        return paths
 
-                # Find distance from origin to point.
-                a = (point[0] - origin[0],
-                    point[1] - origin[1])
+    @staticmethod
+    def load_cell_columns(directory="") -> dict:
+        columns = {}
+        for name in HexGridMeshMaker.cell_column_widths:
+            path = os.path.join(directory, name + ".npy")
+            if os.path.isfile(path):
+                columns[name] = np.load(path, mmap_mode="r")
+        return columns
 
-                if terrain_type == "LINEAR":
+    @staticmethod
+    def cell_heights(
+            points=None,
+            extrude_lb=0.000001,
+            extrude_ub=1.0,
+            terrain_type="UNIFORM",
+            noise_influence=0.0,
+            noise_scale=1.0,
+            noise_offset=(0.0, 0.0, 0.0),
+            noise_basis="BLENDER",
+            origin=(-1.0, -1.0),
+            dest=(1.0, 1.0),
+            axial=None,
+            seed_cells="",
+            distance_cost=0.0,
+            distance_max=0.0) -> list:
+
+        noise_facs = HexGridMeshMaker.noise_factors(
+            points=points,
+            noise_scale=noise_scale,
+            noise_offset=noise_offset,
+            noise_basis=noise_basis)
+
+        terrain_facs = HexGridMeshMaker.terrain_factors(
+            points=points,
+            terrain_type=terrain_type,
+            origin=origin,
+            dest=dest,
+            axial=axial,
+            seeds=HexGridMeshMaker.parse_seeds(seed_cells),
+            costs=HexGridMeshMaker.distance_costs(noise_facs, distance_cost),
+            distance_max=distance_max)
+
+        return HexGridMeshMaker.mix_heights(
+            terrain_facs=terrain_facs,
+            noise_facs=noise_facs,
+            extrude_lb=extrude_lb,
+            extrude_ub=extrude_ub,
+            noise_influence=noise_influence)
 
-                    # Find the clamped scalar projection.
-                    dot_ab = a[0] * b[0] + a[1] * b[1]
-                    scalar_proj = dot_ab * inv_dot_bb
-                    terrain_fac = max(0.0, min(1.0, scalar_proj))
+    @staticmethod
+    def terrain_factors(
+            points=None,
+            terrain_type="UNIFORM",
+            origin=(-1.0, -1.0),
+            dest=(1.0, 1.0),
+            axial=None,
+            seeds=None,
+            costs=None,
+            distance_max=0.0) -> list:
 
-                elif terrain_type == "SPHERICAL":
+        if terrain_type == "DISTANCE":
+            # Without seeds, distance is measured from the cell nearest
+            # to the origin.
+            if not seeds and points:
+                nearest = min(range(len(points)), key=lambda k:
+                    (points[k][0] - origin[0]) ** 2 + (points[k][1] - origin[1]) ** 2)
+                seeds = [axial[nearest]]
+            return HexGridMeshMaker.distance_factors(
+                axial=axial,
+                seeds=seeds,
+                costs=costs,
+                distance_max=distance_max)
 
-                    # Divide distance squared by max distance squared.
-                    dot_aa = a[0] ** 2 + a[1] ** 2
-                    norm_dot = dot_aa * inv_dot_bb
-                    terrain_fac = 1.0 - max(0.0, min(1.0, norm_dot))
+        # For linear gradient.
+        b = (dest[0] - origin[0],
+            dest[1] - origin[1])
+        dot_bb = b[0] ** 2 + b[1] ** 2
+        inv_dot_bb = 0.0 if dot_bb == 0.0 else 1.0 / dot_bb
 
-                elif terrain_type == "CONIC":
+        # For conic gradient.
+        offset_ang = math.atan2(b[1], b[0])
 
-                    ang = (offset_ang - math.atan2(a[1], a[0])) % math.tau
-                    terrain_fac = ang / math.tau
+        facs = []
+        for point in points:
 
-                else:
+            # Find distance from origin to point.
+            a = (point[0] - origin[0],
+                point[1] - origin[1])
+
+            if terrain_type == "LINEAR":
+
+                # Find the clamped scalar projection.
+                dot_ab = a[0] * b[0] + a[1] * b[1]
+                scalar_proj = dot_ab * inv_dot_bb
+                terrain_fac = max(0.0, min(1.0, scalar_proj))
+
+            elif terrain_type == "SPHERICAL":
+
+                # Divide distance squared by max distance squared.
+                dot_aa = a[0] ** 2 + a[1] ** 2
+                norm_dot = dot_aa * inv_dot_bb
+                terrain_fac = 1.0 - max(0.0, min(1.0, norm_dot))
+
+            elif terrain_type == "CONIC":
+
+                ang = (offset_ang - math.atan2(a[1], a[0])) % math.tau
+                terrain_fac = ang / math.tau
+
+            else:
+
+                # UNIFORM is default.
+                terrain_fac = 1.0
+
+            facs.append(terrain_fac)
+
+        return facs
+
+    @staticmethod
+    def distance_factors(
+            axial=None,
+            seeds=None,
+            costs=None,
+            distance_max=0.0) -> list:
+
+        cell_count = len(axial)
+        lookup = {}
+        for cell_idx, coord in enumerate(axial):
+            lookup[coord] = cell_idx
+
+        inf = float("inf")
+        dists = [inf] * cell_count
+        sources = []
+        for seed in seeds:
+            cell_idx = lookup.get(seed)
+            if cell_idx is not None and dists[cell_idx] > 0.0:
+                dists[cell_idx] = 0.0
+                sources.append(cell_idx)
+
+        neighbors = HexGridMeshMaker.edge_neighbors
+        if costs is None:
+            # Every step costs the same, so a breadth first search from all
+            # seeds at once finds the least distance.
+            queue = deque(sources)
+            while queue:
+                cell_idx = queue.popleft()
+                i, j = axial[cell_idx]
+                dist_next = dists[cell_idx] + 1.0
+                for offset in neighbors:
+                    nbr_idx = lookup.get((i + offset[0], j + offset[1]))
+                    if nbr_idx is not None and dists[nbr_idx] == inf:
+                        dists[nbr_idx] = dist_next
+                        queue.append(nbr_idx)
+        else:
+            # A step costs the mean of the two cells' costs.
+            heap = [(0.0, cell_idx) for cell_idx in sources]
+            while heap:
+                dist, cell_idx = heapq.heappop(heap)
+                if dist > dists[cell_idx]:
+                    continue
+                i, j = axial[cell_idx]
+                cost = costs[cell_idx]
+                for offset in neighbors:
+                    nbr_idx = lookup.get((i + offset[0], j + offset[1]))
+                    if nbr_idx is None:
+                        continue
+                    dist_next = dist + 0.5 * (cost + costs[nbr_idx])
+                    if dist_next < dists[nbr_idx]:
+                        dists[nbr_idx] = dist_next
+                        heapq.heappush(heap, (dist_next, nbr_idx))
+
+        # Cells that cannot be reached are given the upper bound.
+        dist_norm = distance_max
+        if dist_norm <= 0.0:
+            dist_norm = max((dist for dist in dists if dist < inf), default=0.0)
+        inv_norm = 0.0 if dist_norm <= 0.0 else 1.0 / dist_norm
+        return [1.0 if dist == inf else min(1.0, dist * inv_norm) for dist in dists]
+
+    @staticmethod
+    def distance_costs(noise_facs=None, distance_cost=0.0) -> list:
+        if distance_cost <= 0.0:
+            return None
+        return [1.0 + distance_cost * noise_fac for noise_fac in noise_facs]
+
+    @staticmethod
+    def parse_seeds(seed_cells="") -> list:
+        # Seeds are either pairs of axial coordinates or a string such as
+        # "0, 0; 3, -1".
+        if not isinstance(seed_cells, str):
+            return [(int(seed[0]), int(seed[1])) for seed in seed_cells]
+
+        seeds = []
+        for entry in seed_cells.split(";"):
+            parts = entry.replace(",", " ").split()
+            if len(parts) >= 2:
+                try:
+                    seeds.append((int(parts[0]), int(parts[1])))
+                except ValueError:
+                    continue
+        return seeds
+
+    @staticmethod
+    def noise_factors(
+            points=None,
+            noise_scale=1.0,
+            noise_offset=(0.0, 0.0, 0.0),
+            noise_basis="BLENDER") -> list:
+
+        noise = mathutils.noise.noise
+        facs = []
+        for point in points:
+
+            # Offset and scale the noise input.
+            noise_in = (noise_scale * point[0] + noise_offset[0],
+                        noise_scale * point[1] + noise_offset[1],
+                        noise_scale * point[2] + noise_offset[2])
+
+            # Returns a value in [-1, 1] that needs to be converted to [0, 1].
+            facs.append(0.5 + 0.5 * noise(noise_in, noise_basis=noise_basis))
+
+        return facs
+
+    @staticmethod
+    def mix_heights(
+            terrain_facs=None,
+            noise_facs=None,
+            extrude_lb=0.000001,
+            extrude_ub=1.0,
+            noise_influence=0.0) -> list:
+
+        # Validate input arguments.
+        verif_lb = min(extrude_lb, extrude_ub)
+        verif_ub = max(extrude_lb, extrude_ub)
+        verif_infl = max(0.0, min(noise_influence, 1.0))
 
-                    # UNIFORM is default.
-                    terrain_fac = 1.0
+        # Factor in noise contribution, then lerp from lower to upper.
+        heights = []
+        for terrain_fac, noise_fac in zip(terrain_facs, noise_facs):
+            fac = (1.0 - verif_infl) * terrain_fac + verif_infl * noise_fac
+            heights.append((1.0 - fac) * verif_lb + fac * verif_ub)
 
-                # Offset and scale the noise input.
-                noise_in = (noise_scale * point[0] + noise_offset[0],
-                            noise_scale * point[1] + noise_offset[1],
-                            noise_scale * point[2] + noise_offset[2])
+        return heights
 
-                # Returns a value in [-1, 1] that needs to be converted to [0, 1].
-                noise_fac = 0.5 + 0.5 * mathutils.noise.noise(
-                    noise_in, noise_basis=noise_basis)
 
-                # Factor in noise contribution, then lerp from lower to upper.
-                fac = (1.0 - verif_infl) * terrain_fac + verif_infl * noise_fac
-                z = (1.0 - fac) * verif_lb + fac * verif_ub
+class HexGridHeightUpdater(bpy.types.Operator):
+    """Rewrites the cell heights of selected hex grids without rebuilding them"""
 
-                # Translate.
-                bmesh.ops.translate(bm, verts=new_verts, vec=(0.0, 0.0, z))
+    bl_idname = "object.hexgrid_update_heights"
+    bl_label = "Update Hex Grid Heights"
+    bl_options = {"REGISTER", "UNDO"}
+
+    # Settings that decide the cells of a grid. Chunks of one grid share
+    # these, even after their heights are updated.
+    grid_keys = [
+        "rings",
+        "cell_radius",
+        "orientation",
+        "board_shape",
+        "board_width",
+        "board_height",
+        "mask_image",
+        "mask_threshold",
+        "cell_order",
+        "chunk_type",
+        "chunk_count"]
+
+    extrude_lb: FloatProperty(
+        name="Extrude Lower",
+        description="Extrusion lower bound on the z axis",
+        min=0.0,
+        soft_max=1.0,
+        step=1,
+        precision=3,
+        default=0.0) # type: ignore
+
+    extrude_ub: FloatProperty(
+        name="Extrude Upper",
+        description="Extrusion upper bound on the z axis",
+        min=0.0,
+        soft_max=2.0,
+        step=1,
+        precision=3,
+        default=0.0) # type: ignore
+
+    terrain_type: EnumProperty(
+        items=[
+            ("UNIFORM", "Uniform", "Extrude by a uniform amount", 1),
+            ("LINEAR", "Linear", "Linear gradient", 2),
+            ("SPHERICAL", "Spherical", "Spherical gradient", 3),
+            ("CONIC", "Conic", "Conic gradient", 4),
+            ("DISTANCE", "Hex Distance", "Gradient by the number of cells to the nearest seed cell", 5)],
+        name="Terrain Type",
+        default="UNIFORM",
+        description="How to extrude each hexagon cell") # type: ignore
+
+    origin: FloatVectorProperty(
+        name="Origin",
+        description="Linear gradient origin",
+        default=(-1.0, -1.0),
+        soft_min=-1.0,
+        soft_max=1.0,
+        step=1,
+        precision=3,
+        size=2,
+        subtype="TRANSLATION") # type: ignore
+
+    destination: FloatVectorProperty(
+        name="Destination",
+        description="Linear gradient destination",
+        default=(1.0, 1.0),
+        soft_min=-1.0,
+        soft_max=1.0,
+        step=1,
+        precision=3,
+        size=2,
+        subtype="TRANSLATION") # type: ignore
+
+    seed_cells: StringProperty(
+        name="Seed Cells",
+        description="Axial coordinates of the cells that hex distance is measured from, "
+            "such as \"0, 0; 3, -1\"; if empty, the cell nearest to the origin is used",
+        default="") # type: ignore
+
+    distance_cost: FloatProperty(
+        name="Distance Cost",
+        description="Amount that noise adds to the cost of crossing a cell when measuring hex distance",
+        min=0.0,
+        soft_max=10.0,
+        step=1,
+        precision=3,
+        default=0.0) # type: ignore
+
+    distance_max: FloatProperty(
+        name="Distance Max",
+        description="Hex distance at which the upper bound is reached; if zero, the farthest cell is used",
+        min=0.0,
+        soft_max=64.0,
+        step=100,
+        precision=1,
+        default=0.0) # type: ignore
+
+    noise_influence: FloatProperty(
+        name="Noise Influence",
+        description="Amount that noise contributes to the extrusion",
+        default=0.0,
+        step=1,
+        precision=3,
+        min=0.0,
+        max=1.0,
+        subtype="FACTOR") # type: ignore
+
+    noise_scale: FloatProperty(
+        name="Noise Scale",
+        description="Scalar multiplied with noise input; values less than 1.0 yield a smoother result",
+        soft_min=0.0,
+        soft_max=10.0,
+        step=1,
+        precision=3,
+        default=1.0) # type: ignore
+
+    noise_offset: FloatVectorProperty(
+        name="Noise Offset",
+        description="Offset added to noise input",
+        default=(0.0, 0.0, 0.0),
+        step=1,
+        precision=3,
+        subtype="TRANSLATION") # type: ignore
+
+    noise_basis: EnumProperty(
+        items=[
+            ("BLENDER", "Blender", "Blender", 1),
+            ("PERLIN_ORIGINAL", "Perlin Original", "Perlin Original", 2),
+            ("PERLIN_NEW", "Perlin New", "Perlin New", 3),
+            ("VORONOI_F1", "Voronoi F1", "Voronoi F1", 4),
+            ("VORONOI_F2", "Voronoi F2", "Voronoi F2", 5),
+            ("VORONOI_F3", "Voronoi F3", "Voronoi F3", 6),
+            ("VORONOI_F4", "Voronoi F4", "Voronoi F4", 7),
+            ("VORONOI_F2F1", "Voronoi F2 F1", "Voronoi F2 F1", 8),
+            ("VORONOI_CRACKLE", "Voronoi Crackle", "Voronoi Crackle", 9),
+            ("CELLNOISE", "Cell Noise", "Cell Noise", 10)],
+        name="Noise Basis",
+        default="BLENDER",
+        description="Underlying noise algorithm to use") # type: ignore
+
+    def invoke(self, context, event):
+        # Start from the settings the active grid was last built with.
+        mesh_data = context.active_object.data
+        settings = mesh_data.get("hex_grid") if mesh_data is not None else None
+        if settings is not None:
+            for key in self.as_keywords():
+                if key in settings:
+                    value = settings[key]
+                    if hasattr(value, "to_list"):
+                        value = value.to_list()
+                    setattr(self, key, value)
+        return self.execute(context)
+
+    def execute(self, context):
+        params = self.as_keywords()
+        for obj in context.selected_objects:
+            if HexGridHeightUpdater.is_hex_grid(obj):
+                HexGridHeightUpdater.update_heights(
+                    obj.data,
+                    meshes=HexGridHeightUpdater.grid_meshes(obj),
+                    **params)
+        return {"FINISHED"}
+
+    @classmethod
+    def poll(cls, context):
+        return context.mode == "OBJECT" \
+            and HexGridHeightUpdater.is_hex_grid(context.active_object)
+
+    @staticmethod
+    def is_hex_grid(obj=None) -> bool:
+        return obj is not None \
+            and obj.type == "MESH" \
+            and "vert_cell_id" in obj.data.attributes
+
+    @staticmethod
+    def grid_meshes(obj=None) -> list:
+        # Chunks of a grid are children of one parent.
+        settings = obj.data.get("hex_grid")
+        if obj.parent is None or settings is None \
+                or settings.get("chunk_type", "NONE") == "NONE":
+            return [obj.data]
+
+        meshes = []
+        for child in obj.parent.children:
+            if not HexGridHeightUpdater.is_hex_grid(child) or child.data in meshes:
+                continue
+            other = child.data.get("hex_grid")
+            if other is not None and all(other.get(key) == settings.get(key)
+                    for key in HexGridHeightUpdater.grid_keys):
+                meshes.append(child.data)
+        return meshes
+
+    @staticmethod
+    def grid_cells(mesh_data=None, table=None, meshes=None) -> dict:
+        # Cells of all chunks of a grid, from the ids and axial coordinates
+        # stored when it was generated.
+        if not meshes:
+            meshes = [mesh_data]
+        cell_ids = []
+        axial = []
+        for chunk_data in meshes:
+            stored_cells = chunk_data.get("hex_grid_cells")
+            stored_axial = chunk_data.get("hex_grid_axial")
+            if stored_cells is None or stored_axial is None:
+                return None
+            cell_ids.extend(stored_cells)
+            axial.extend(stored_axial)
+
+        # Row of each of the mesh's cells among the grid's cells.
+        cell_ids = np.array(cell_ids, dtype=np.int32)
+        used = table["cell_ids"]
+        lut = np.full(max(int(cell_ids.max()), int(used.max())) + 1, -1, dtype=np.int32)
+        lut[cell_ids] = np.arange(len(cell_ids), dtype=np.int32)
+        rows = lut[used]
+        if (rows < 0).any():
+            return None
+
+        settings = mesh_data.get("hex_grid") or {}
+        coords = list(zip(axial[0::2], axial[1::2]))
+        return {
+            "rows": rows,
+            "axial": coords,
+            "points": HexGridMeshMaker.cell_centers(
+                coords=coords,
+                cell_radius=settings.get("cell_radius", 0.5),
+                orientation=settings.get("orientation", 0.0))}
+
+    @staticmethod
+    def update_heights(
+            mesh_data=None,
+            meshes=None,
+            extrude_lb=0.0,
+            extrude_ub=0.0,
+            terrain_type="UNIFORM",
+            origin=(-1.0, -1.0),
+            destination=(1.0, 1.0),
+            seed_cells="",
+            distance_cost=0.0,
+            distance_max=0.0,
+            noise_influence=0.0,
+            noise_scale=1.0,
+            noise_offset=(0.0, 0.0, 0.0),
+            noise_basis="BLENDER") -> bool:
+
+        table = HexGridHeightUpdater.cell_table(mesh_data)
+        if table is None:
+            return False
+
+        settings = mesh_data.get("hex_grid")
+        merged = settings is not None and settings.get("verif_merge", False)
+        if merged:
+            # Shared vertices cannot have per cell heights.
+            heights = [max(extrude_lb, extrude_ub)] * len(table["cell_ids"])
+        else:
+            # Terrain is found over the whole grid, as when it was
+            # generated, then the mesh's own cells are kept.
+            grid = HexGridHeightUpdater.grid_cells(mesh_data, table, meshes)
+            if grid is None:
+                return False
+
+            heights = HexGridMeshMaker.cell_heights(
+                points=grid["points"],
+                extrude_lb=extrude_lb,
+                extrude_ub=extrude_ub,
+                terrain_type=terrain_type,
+                noise_influence=noise_influence,
+                noise_scale=noise_scale,
+                noise_offset=noise_offset,
+                noise_basis=noise_basis,
+                origin=origin,
+                dest=destination,
+                axial=grid["axial"],
+                seed_cells=seed_cells,
+                distance_cost=distance_cost,
+                distance_max=distance_max)
+            heights = np.asarray(heights, dtype=np.float32)[grid["rows"]]
+
+        HexGridHeightUpdater.write_heights(mesh_data, table, heights)
+
+        if settings is not None:
+            settings.update(HexGridMeshMaker.settings_dict({
+                "extrude_lb": extrude_lb,
+                "extrude_ub": extrude_ub,
+                "terrain_type": terrain_type,
+                "origin": origin,
+                "destination": destination,
+                "seed_cells": seed_cells,
+                "distance_cost": distance_cost,
+                "distance_max": distance_max,
+                "noise_influence": noise_influence,
+                "noise_scale": noise_scale,
+                "noise_offset": noise_offset,
+                "noise_basis": noise_basis}))
 
-        bm.normal_update()
         return True
 
+    @staticmethod
+    def cell_table(mesh_data=None) -> dict:
+        vert_count = len(mesh_data.vertices)
+        if vert_count < 1:
+            return None
+
+        co = np.empty(vert_count * 3, dtype=np.float32)
+        cell_ids = np.empty(vert_count, dtype=np.int32)
+        mesh_data.vertices.foreach_get("co", co)
+        mesh_data.attributes["vert_cell_id"].data.foreach_get("value", cell_ids)
+
+        # Grids built with a transform are measured, and raised, in the
+        # space they were generated in.
+        settings = mesh_data.get("hex_grid")
+        transform = settings.get("transform") if settings is not None else None
+        affine = None
+        local = co
+        if transform is not None:
+            affine = np.array(transform, dtype=np.float64).reshape(4, 4)
+            local = ((co.reshape(-1, 3) - affine[:3, 3])
+                @ np.linalg.inv(affine[:3, :3]).T).astype(np.float32).ravel()
+
+        # Only top vertices of extruded cells move. If the grid was not
+        # extruded, the cells themselves are raised.
+        top_attr = mesh_data.attributes.get("vert_top")
+        movable = np.zeros(vert_count, dtype=np.int32)
+        if top_attr is not None:
+            top_attr.data.foreach_get("value", movable)
+        movable = movable != 0
+        if not movable.any():
+            movable[:] = True
+
+        moved_ids = cell_ids[movable]
+
+        # Cells with moving vertices.
+        cell_len = int(moved_ids.max()) + 1
+        counts = np.bincount(moved_ids, minlength=cell_len)
+        used = np.nonzero(counts)[0]
+
+        # Cells are renumbered so that heights can be looked up by the
+        # position of their id among used ids.
+        lut = np.zeros(cell_len, dtype=np.int32)
+        lut[used] = np.arange(len(used), dtype=np.int32)
+
+        return {
+            "co": co,
+            "local": local,
+            "affine": affine,
+            "movable": movable,
+            "vert_cells": lut[moved_ids],
+            "cell_ids": used}
+
+    @staticmethod
+    def write_heights(mesh_data=None, table=None, heights=None):
+        local = table["local"]
+        heights = np.asarray(heights, dtype=np.float32)
+        local[2::3][table["movable"]] = heights[table["vert_cells"]]
+
+        co = local
+        affine = table["affine"]
+        if affine is not None:
+            co = (local.reshape(-1, 3) @ affine[:3, :3].T
+                + affine[:3, 3]).astype(np.float32).ravel()
+        mesh_data.vertices.foreach_set("co", co)
+        mesh_data.update()
+
+
+# Cell tables of animated grids, keyed by mesh, so that only the noise is
+# recalculated on each frame.
+animated_tables = {}
+
+
+@persistent
+def animate_noise_handler(scene, depsgraph=None):
+    frame = scene.frame_current_final
+    animated_uids = set()
+    for obj in scene.objects:
+        if obj.type != "MESH":
+            continue
+        mesh_data = obj.data
+        settings = mesh_data.get("hex_grid")
+        if settings is None or not settings.get("animate_noise", False):
+            continue
+        if settings.get("verif_merge", False):
+            continue
+        if "vert_cell_id" not in mesh_data.attributes:
+            continue
+        animated_uids.add(mesh_data.session_uid)
+        meshes = HexGridHeightUpdater.grid_meshes(obj)
+
+        # Terrain factors do not depend on the frame and are cached along
+        # with the cell table. They are found over all chunks of the grid,
+        # and are rebuilt if the mesh, its chunks or its terrain settings
+        # change. Hex distance costs come from the noise before it is
+        # animated.
+        terrain_key = (
+            len(mesh_data.vertices),
+            settings.get("terrain_type", "UNIFORM"),
+            tuple(settings.get("origin", (-1.0, -1.0))),
+            tuple(settings.get("destination", (1.0, 1.0))),
+            settings.get("seed_cells", ""),
+            settings.get("distance_cost", 0.0),
+            settings.get("distance_max", 0.0),
+            settings.get("noise_scale", 1.0),
+            tuple(settings.get("noise_offset", (0.0, 0.0, 0.0))),
+            settings.get("noise_basis", "BLENDER"),
+            tuple(settings.get("transform", ())),
+            tuple(sorted(chunk_data.session_uid for chunk_data in meshes)))
+        entry = animated_tables.get(mesh_data.session_uid)
+        if entry is None or entry[0] != terrain_key:
+            table = HexGridHeightUpdater.cell_table(mesh_data)
+            if table is None:
+                continue
+            grid = HexGridHeightUpdater.grid_cells(mesh_data, table, meshes)
+            if grid is None:
+                continue
+
+            costs = None
+            if terrain_key[1] == "DISTANCE":
+                costs = HexGridMeshMaker.distance_costs(
+                    HexGridMeshMaker.noise_factors(
+                        points=grid["points"],
+                        noise_scale=terrain_key[7],
+                        noise_offset=terrain_key[8],
+                        noise_basis=terrain_key[9]),
+                    terrain_key[5])
+
+            terrain_facs = HexGridMeshMaker.terrain_factors(
+                points=grid["points"],
+                terrain_type=terrain_key[1],
+                origin=terrain_key[2],
+                dest=terrain_key[3],
+                axial=grid["axial"],
+                seeds=HexGridMeshMaker.parse_seeds(terrain_key[4]),
+                costs=costs,
+                distance_max=terrain_key[6])
+            rows = grid["rows"]
+            entry = (
+                terrain_key,
+                table,
+                [terrain_facs[row] for row in rows],
+                [grid["points"][row] for row in rows])
+            animated_tables[mesh_data.session_uid] = entry
+        table = entry[1]
+        terrain_facs = entry[2]
+        points = entry[3]
+
+        offset = settings.get("noise_offset", (0.0, 0.0, 0.0))
+        speed = settings.get("noise_speed", (0.0, 0.0, 0.0))
+        noise_facs = HexGridMeshMaker.noise_factors(
+            points=points,
+            noise_scale=settings.get("noise_scale", 1.0),
+            noise_offset=(
+                offset[0] + frame * speed[0],
+                offset[1] + frame * speed[1],
+                offset[2] + frame * speed[2]),
+            noise_basis=settings.get("noise_basis", "BLENDER"))
+
+        heights = HexGridMeshMaker.mix_heights(
+            terrain_facs=terrain_facs,
+            noise_facs=noise_facs,
+            extrude_lb=settings.get("extrude_lb", 0.0),
+            extrude_ub=settings.get("extrude_ub", 0.0),
+            noise_influence=settings.get("noise_influence", 0.0))
+
+        HexGridHeightUpdater.write_heights(mesh_data, table, heights)
+
+    # Tables of meshes that were removed, or are no longer animated in this
+    # scene, are released.
+    for uid in list(animated_tables):
+        if uid not in animated_uids:
+            del animated_tables[uid]
+
 
 def menu_func(self, context):
 
@@ -692,13 +2720,28 @@ def menu_func(self, context):
     # then enable Icon Viewer. Then, in the Console Editor window,
     # click on the Icon Viewer button.
     self.layout.operator(HexGridMeshMaker.bl_idname, icon="SEQ_CHROMA_SCOPE")
+    self.layout.operator(
+        HexGridMeshMaker.bl_idname,
+        text="Hex Grid (Time-Sliced)",
+        icon="SEQ_CHROMA_SCOPE").use_modal = True
+
+
+def menu_func_update(self, context):
+    self.layout.operator(HexGridHeightUpdater.bl_idname, icon="SEQ_CHROMA_SCOPE")
 
 
 def register():
     bpy.utils.register_class(HexGridMeshMaker)
+    bpy.utils.register_class(HexGridHeightUpdater)
     bpy.types.VIEW3D_MT_mesh_add.append(menu_func)
+    bpy.types.VIEW3D_MT_object.append(menu_func_update)
+    bpy.app.handlers.frame_change_pre.append(animate_noise_handler)
 
 
 def unregister():
     bpy.utils.unregister_class(HexGridMeshMaker)
+    bpy.utils.unregister_class(HexGridHeightUpdater)
     bpy.types.VIEW3D_MT_mesh_add.remove(menu_func)
+    bpy.types.VIEW3D_MT_object.remove(menu_func_update)
+    bpy.app.handlers.frame_change_pre.remove(animate_noise_handler)
+    animated_tables.clear()
@@ -0,0 +1,101 @@
+"""Checks the cell table read back from meshes against the generator's.
+
+Run inside Blender, as the add-ons need bpy:
+
+    blender -b --factory-startup --python tests/test_cell_columns.py
+"""
+
+import os
+import sys
+import unittest
+
+try:
+    import bpy # type: ignore
+except ImportError:
+    raise unittest.SkipTest("Requires Blender")
+import numpy as np # type: ignore
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from hex_grid_mesh import HexGridMeshMaker
+
+
+class TestMeshCellColumns(unittest.TestCase):
+
+    def assert_columns_match(self, merge_verts=False, cell_order="AXIAL", transform=None):
+        rings = 6
+        coords = HexGridMeshMaker.axial_coords(rings, cell_order)
+        grid = HexGridMeshMaker.grid_hex(
+            rings=rings,
+            cells=HexGridMeshMaker.chunk_cells(coords=coords)[0],
+            cell_radius=0.7,
+            cell_margin=0.0,
+            orientation=0.4,
+            transform=transform,
+            merge_verts=merge_verts)
+        grid = HexGridMeshMaker.extrude_hexagons(
+            grid=grid,
+            extrude_lb=0.2,
+            extrude_ub=0.2 if merge_verts else 0.9,
+            terrain_type="LINEAR",
+            merge_verts=merge_verts)
+
+        mesh_data = HexGridMeshMaker.mesh_from_arrays(
+            "Hex.Grid.Test", HexGridMeshMaker.arrays_from_grid(grid))
+        settings = {"cell_radius": 0.7, "orientation": 0.4}
+        if transform is not None:
+            settings["transform"] = HexGridMeshMaker.flat_matrix(transform)
+        mesh_data["hex_grid"] = settings
+        try:
+            expected = HexGridMeshMaker.cell_columns(grid)
+            actual = HexGridMeshMaker.mesh_cell_columns(mesh_data)
+            co = np.empty(len(mesh_data.vertices) * 3, dtype=np.float32)
+            mesh_data.vertices.foreach_get("co", co)
+        finally:
+            bpy.data.meshes.remove(mesh_data)
+
+        for name, column in expected.items():
+            values = np.asarray(actual[name])
+            np.testing.assert_allclose(
+                np.asarray(column).reshape(values.shape), values,
+                atol=0.00001, err_msg=name)
+
+        # Unmerged cells own all of their top vertices, which are centered
+        # on the cell's exported center.
+        if not merge_verts:
+            co = co.reshape(-1, 3)
+            vert_top = np.asarray(grid["vert_top"]) != 0
+            vert_cells = np.asarray(grid["vert_cells"])
+            for row, cell_id in enumerate(actual["cell_id"]):
+                np.testing.assert_allclose(
+                    co[vert_top & (vert_cells == cell_id)].mean(axis=0),
+                    actual["center"][row], atol=0.0001, err_msg=str(cell_id))
+
+    def test_unmerged(self):
+        self.assert_columns_match(merge_verts=False)
+
+    def test_merged(self):
+        self.assert_columns_match(merge_verts=True)
+
+    def test_merged_hilbert(self):
+        self.assert_columns_match(merge_verts=True, cell_order="HILBERT")
+
+    def test_transformed(self):
+        self.assert_columns_match(transform=[
+            [2.0, 0.0, 0.3, 1.0],
+            [0.0, 1.0, 0.5, 2.0],
+            [0.2, 0.0, 3.0, 0.5],
+            [0.0, 0.0, 0.0, 1.0]])
+
+    def test_merged_transformed(self):
+        self.assert_columns_match(merge_verts=True, transform=[
+            [0.0, -1.5, 0.0, 0.0],
+            [1.5, 0.0, 0.0, 0.0],
+            [0.0, 0.0, 1.0, 2.0],
+            [0.0, 0.0, 0.0, 1.0]])
+
+
+if __name__ == "__main__":
+    # Blender's own arguments come before a double dash.
+    argv = sys.argv[sys.argv.index("--"):] if "--" in sys.argv else sys.argv[:1]
+    result = unittest.main(argv=argv, exit=False).result
+    sys.exit(0 if result.wasSuccessful() else 1)
@@ -0,0 +1,103 @@
+"""Checks the border flags and cells stored on the edges of wire grids.
+
+Run inside Blender, as the add-ons need bpy:
+
+    blender -b --factory-startup --python tests/test_edge_attributes.py
+"""
+
+import os
+import sys
+import unittest
+
+try:
+    import bpy # type: ignore
+except ImportError:
+    raise unittest.SkipTest("Requires Blender")
+import numpy as np # type: ignore
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from hex_grid_mesh import HexGridMeshMaker
+
+
+class TestEdgeAttributes(unittest.TestCase):
+
+    def assert_borders_match(self, merge_verts=False, chunk_type="NONE"):
+        cell_radius = 0.7
+        meshes = HexGridMeshMaker.run_steps(HexGridMeshMaker.mesh_steps(
+            rings=5,
+            cell_radius=cell_radius,
+            cell_margin=0.0,
+            orientation=0.4,
+            merge_verts=merge_verts,
+            face_type="WIRE",
+            edge_attributes=True,
+            chunk_type=chunk_type,
+            chunk_count=3))
+
+        try:
+            # Cells of every chunk, so that seams are not taken for borders.
+            cell_ids = []
+            coords = []
+            for mesh_data in meshes:
+                cell_ids.extend(mesh_data["hex_grid_cells"])
+                axial = list(mesh_data["hex_grid_axial"])
+                coords.extend(zip(axial[0::2], axial[1::2]))
+            cell_ids = np.array(cell_ids, dtype=np.int32)
+            centers = np.array(HexGridMeshMaker.cell_centers(
+                coords=coords,
+                cell_radius=cell_radius,
+                orientation=0.4), dtype=np.float64).reshape(-1, 3)[:, :2]
+
+            for mesh_data in meshes:
+                edge_count = len(mesh_data.edges)
+                vert_count = len(mesh_data.vertices)
+                self.assertGreater(edge_count, 0)
+
+                co = np.empty(vert_count * 3, dtype=np.float32)
+                edges = np.empty(edge_count * 2, dtype=np.int32)
+                mesh_data.vertices.foreach_get("co", co)
+                mesh_data.edges.foreach_get("vertices", edges)
+                co = co.reshape(-1, 3)[:, :2]
+                edges = edges.reshape(-1, 2)
+
+                values = {}
+                for name in ["edge_border", "edge_cell_a", "edge_cell_b"]:
+                    values[name] = np.empty(edge_count, dtype=np.int32)
+                    mesh_data.attributes[name].data.foreach_get("value", values[name])
+
+                # An edge's midpoint is an inradius away from the centers of
+                # the cells on either side of it, and farther from all others.
+                mids = 0.5 * (co[edges[:, 0]] + co[edges[:, 1]])
+                dists = np.linalg.norm(mids[:, None, :] - centers[None, :, :], axis=2)
+                near = dists < cell_radius * 0.95
+
+                for edge_idx in range(edge_count):
+                    adjacent = set(cell_ids[near[edge_idx]].tolist())
+                    border = values["edge_border"][edge_idx]
+                    cell_a = values["edge_cell_a"][edge_idx]
+                    cell_b = values["edge_cell_b"][edge_idx]
+                    self.assertEqual(border == 1, len(adjacent) == 1, edge_idx)
+                    self.assertIn(cell_a, adjacent, edge_idx)
+                    if border == 1:
+                        self.assertEqual(cell_b, -1, edge_idx)
+                    else:
+                        self.assertEqual(adjacent, {cell_a, cell_b}, edge_idx)
+        finally:
+            for mesh_data in meshes:
+                bpy.data.meshes.remove(mesh_data)
+
+    def test_unmerged(self):
+        self.assert_borders_match(merge_verts=False)
+
+    def test_merged(self):
+        self.assert_borders_match(merge_verts=True)
+
+    def test_merged_sectors(self):
+        self.assert_borders_match(merge_verts=True, chunk_type="SECTOR")
+
+
+if __name__ == "__main__":
+    # Blender's own arguments come before a double dash.
+    argv = sys.argv[sys.argv.index("--"):] if "--" in sys.argv else sys.argv[:1]
+    result = unittest.main(argv=argv, exit=False).result
+    sys.exit(0 if result.wasSuccessful() else 1)